@@ -1,179 +1,472 @@
-import json
+import hashlib
+import queue
+import re
 import sqlite3
 import threading
+import time
 import logging
 from datetime import datetime
-from app.config import OPENAI_API_KEY, DATABASE_PATH, ALLOWED_TAGS
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from functools import lru_cache
+import orjson
+from app.config import (
+    OPENAI_API_KEY, ALLOWED_TAGS, ALLOWED_TAGS_SET, AI_WORKER_COUNT, AI_BATCH_SIZE, AI_BATCH_WAIT_SECONDS,
+    OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT, AI_STATUS_CODES
 )
+from app.database import get_connection
+
 logger = logging.getLogger(__name__)
 
 
+# Keyword map for fallback tagging (substring match on the casefolded message)
+FALLBACK_KEYWORDS = {
+    "Salary": ["salary", "pay", "wage", "money", "bonus", "compensation", "เงินเดือน"],
+    "Store": ["store", "shop", "location", "branch", "ร้าน"],
+    "Product": ["product", "strain", "weed", "cannabis", "flower", "edible", "สินค้า"],
+    "Conflict": ["conflict", "fight", "argue", "bully", "harass", "toxic", "ทะเลาะ"],
+    "Legal": ["legal", "law", "license", "regulation", "กฎหมาย"],
+    "Management": ["manager", "boss", "supervisor", "lead", "ผู้จัดการ"],
+    "Schedule": ["schedule", "shift", "overtime", "hours", "time", "ตารางงาน"],
+    "Safety": ["safety", "danger", "risk", "accident", "unsafe", "ความปลอดภัย"],
+    "Training": ["training", "learn", "skill", "course", "การฝึกอบรม"],
+    "Equipment": ["equipment", "tool", "broken", "fix", "repair", "อุปกรณ์"],
+    "Customer": ["customer", "client", "complaint", "ลูกค้า"],
+    "Policy": ["policy", "rule", "procedure", "นโยบาย"],
+    "Communication": ["communication", "inform", "meeting", "การสื่อสาร"],
+    "Hygiene": ["clean", "dirty", "hygiene", "sanit", "สะอาด"],
+}
+
+# All keywords compiled into one alternation; the named group identifies the tag
+FALLBACK_KEYWORD_RE = re.compile("|".join(
+    f"(?P<{tag}>{'|'.join(map(re.escape, kws))})" for tag, kws in FALLBACK_KEYWORDS.items()
+))
+
+# Unicode script ranges for fallback language detection, one group per language
+LANGUAGE_SCRIPT_RE = re.compile(r'([\u0E00-\u0E7F])|([\u0400-\u04FF])|([\u4E00-\u9FFF])|([\u0600-\u06FF])')
+LANGUAGE_CODES = ("th", "ru", "zh", "ar")
+
+# Instruction block for batched OpenAI analysis, built once; the JSON array of messages is appended
+_PROMPT_PREFIX = f"""Analyze each anonymous employee feedback message in the JSON array below. Return ONLY valid JSON of the form {{"results": [...]}} with one object per message, in the same order, each with these fields:
+- "id": the message id, copied as-is
+- "detected_language": ISO 639-1 code of the original message language
+- "translation_en": English translation (if already English, copy as-is)
+- "translation_ru": Russian translation
+- "summary": 1-2 sentence summary in English (max 150 chars)
+- "tags": array of 1-3 tags from this list ONLY: [{", ".join(ALLOWED_TAGS)}]
+
+Rules:
+- Only transform/structure the text, do NOT add new facts
+- Preserve cannabis terminology and slang meaning
+- Summary must reflect the key issue or idea
+
+Messages: """
+
+# Messages this short, or one of these stock replies, are not worth an OpenAI call
+MIN_AI_MESSAGE_LENGTH = 8
+TRIVIAL_RESPONSES = frozenset({"ok", "okay", "thanks", "thank you", "none", "n/a", "no", "-", "好", "ดี", "спасибо", "нет"})
+
+# Stores an analysis result and marks the feedback as done
+UPDATE_RESULT_SQL = f"""
+    UPDATE feedback SET
+        ai_status_code = {AI_STATUS_CODES['done']},
+        detected_language = ?,
+        translation_en = ?,
+        translation_ru = ?,
+        summary = ?,
+        tags = ?
+    WHERE id = ?
+"""
+
+# Moves feedback to another AI processing state (code from AI_STATUS_CODES)
+SET_AI_STATUS_SQL = "UPDATE feedback SET ai_status_code = ? WHERE id = ?"
+
+
+# Duplicate messages reuse a prior OpenAI analysis instead of a new API call
+SELECT_CACHED_SQL = """
+    SELECT msg_hash, detected_language, translation_en, translation_ru, summary, tags
+    FROM ai_cache WHERE msg_hash IN ({})
+"""
+INSERT_CACHE_SQL = "INSERT OR REPLACE INTO ai_cache VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+# Jobs are feedback IDs consumed by a fixed pool of long-lived worker threads
+_job_queue = queue.Queue()
+_workers = []
+_workers_lock = threading.Lock()
+
+# Completion events for queued feedback, set (and dropped) once its batch is finished
+_done_events = {}
+_done_events_lock = threading.Lock()
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class _RateLimiter:
+    """Token bucket shared by all workers to stay under the OpenAI RPM/TPM limits."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self.requests_available = float(requests_per_minute)
+        self.tokens_available = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: int):
+        """Block until one request and `tokens` tokens are available, then consume them."""
+        tokens = min(tokens, self.tpm)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                elapsed = now - self.updated
+                self.updated = now
+                self.requests_available = min(self.rpm, self.requests_available + elapsed * self.rpm / 60)
+                self.tokens_available = min(self.tpm, self.tokens_available + elapsed * self.tpm / 60)
+
+                if self.requests_available >= 1 and self.tokens_available >= tokens:
+                    self.requests_available -= 1
+                    self.tokens_available -= tokens
+                    return
+
+                wait = max(
+                    (1 - self.requests_available) * 60 / self.rpm,
+                    (tokens - self.tokens_available) * 60 / self.tpm
+                )
+            time.sleep(wait)
+
+
+_rate_limiter = _RateLimiter(OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT)
+
+
 def process_feedback_async(feedback_id: int):
     """
-    Process feedback asynchronously in a background thread.
+    Queue feedback for processing by the background worker pool.
     Updates AI status and enriches feedback with translations, summary, and tags.
     """
-    thread = threading.Thread(target=_process, args=(feedback_id,))
-    thread.daemon = True
-    thread.start()
-    logger.info(f"Started AI processing for feedback {feedback_id}")
+    _start_workers()
+    with _done_events_lock:
+        _done_events.setdefault(feedback_id, threading.Event())
+    _job_queue.put(feedback_id)
+    logger.info("Queued AI processing for feedback %s", feedback_id)
 
 
-def _process(feedback_id: int):
-    """Main processing function with comprehensive error handling."""
-    db = sqlite3.connect(DATABASE_PATH)
-    db.row_factory = sqlite3.Row
-    
-    try:
-        # Mark as processing
-        db.execute("UPDATE feedback SET ai_status = 'processing' WHERE id = ?", (feedback_id,))
-        db.commit()
-        logger.info(f"Feedback {feedback_id}: Status set to 'processing'")
+def completion_event(feedback_id: int):
+    """
+    Event set when queued feedback has been processed (done or failed),
+    or None if it is not queued in this process (e.g. already finished).
+    """
+    with _done_events_lock:
+        return _done_events.get(feedback_id)
 
-        # Fetch feedback
-        row = db.execute("SELECT * FROM feedback WHERE id = ?", (feedback_id,)).fetchone()
-        if not row:
-            logger.warning(f"Feedback {feedback_id}: Not found in database")
-            return
 
-        message = row["message"] or ""
-        if not message.strip():
-            logger.info(f"Feedback {feedback_id}: Empty message, marking as done")
-            db.execute(
-                "UPDATE feedback SET ai_status = 'done', summary = '', translation_en = '', translation_ru = '', tags = '', detected_language = 'unknown' WHERE id = ?",
-                (feedback_id,))
-            db.commit()
+def _start_workers(n: int = AI_WORKER_COUNT):
+    """Start the worker threads once per process."""
+    with _workers_lock:
+        if _workers:
             return
+        for i in range(n):
+            thread = threading.Thread(target=_worker_loop, name=f"ai-worker-{i}", daemon=True)
+            thread.start()
+            _workers.append(thread)
+    logger.info("Started %s AI processing workers", n)
+
+
+def _worker_loop():
+    """Worker body: one database connection reused for every batch."""
+    db = get_connection()
+
+    while True:
+        feedback_ids = _next_batch()
+        try:
+            _process_batch(feedback_ids, db)
+        except Exception as e:
+            # Never let a single batch kill the worker
+            logger.error("Feedback %s: Worker error - %s: %s", feedback_ids, type(e).__name__, e, exc_info=True)
+            db.rollback()
+        finally:
+            with _done_events_lock:
+                events = [_done_events.pop(feedback_id, None) for feedback_id in feedback_ids]
+            for event in events:
+                if event is not None:
+                    event.set()
+            for _ in feedback_ids:
+                _job_queue.task_done()
+
+
+def _next_batch():
+    """
+    Block for the next job, then collect up to AI_BATCH_SIZE jobs
+    (waiting at most AI_BATCH_WAIT_SECONDS) so OpenAI can analyze them in one request.
+    """
+    feedback_ids = [_job_queue.get()]
+    if not OPENAI_API_KEY:
+        return feedback_ids
+
+    deadline = time.monotonic() + AI_BATCH_WAIT_SECONDS
+    while len(feedback_ids) < AI_BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            feedback_ids.append(_job_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return feedback_ids
+
 
-        # Process with OpenAI or fallback
-        if OPENAI_API_KEY:
-            logger.info(f"Feedback {feedback_id}: Processing with OpenAI")
-            _process_with_openai(db, feedback_id, message)
-        else:
-            logger.info(f"Feedback {feedback_id}: Processing with fallback (no API key)")
-            _process_fallback(db, feedback_id, message)
+def _process_batch(feedback_ids, db: sqlite3.Connection):
+    """Main processing function with comprehensive error handling."""
+    try:
+        # One write transaction for the processing marker, the fetch and every
+        # result that can be computed locally, so the fallback path costs a
+        # single commit per batch. The OpenAI call runs after the commit so the
+        # write lock is never held across network I/O.
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany(SET_AI_STATUS_SQL,
+                           [(AI_STATUS_CODES["processing"], feedback_id) for feedback_id in feedback_ids])
+
+            placeholders = ",".join("?" * len(feedback_ids))
+            rows = db.execute(
+                f"SELECT id, message FROM feedback WHERE id IN ({placeholders})", feedback_ids
+            ).fetchall()
+            found = {feedback_id for feedback_id, _ in rows}
+            for feedback_id in feedback_ids:
+                if feedback_id not in found:
+                    logger.warning("Feedback %s: Not found in database", feedback_id)
+
+            pending = []
+            empty = []
+            for feedback_id, message in rows:
+                message = message or ""
+                if not message.strip():
+                    logger.info("Feedback %s: Empty message, marking as done", feedback_id)
+                    empty.append(("unknown", "", "", "", "", feedback_id))
+                else:
+                    pending.append((feedback_id, message))
+
+            if empty:
+                db.executemany(UPDATE_RESULT_SQL, empty)
+
+            if not OPENAI_API_KEY:
+                for feedback_id, message in pending:
+                    logger.info("Feedback %s: Processing with fallback (no API key)", feedback_id)
+                    _process_fallback(db, feedback_id, message, commit=False)
+            else:
+                remaining = []
+                for feedback_id, message in pending:
+                    if _is_trivial(message):
+                        logger.info("Feedback %s: Processing with fallback (trivial message)", feedback_id)
+                        _process_fallback(db, feedback_id, message, commit=False)
+                    else:
+                        remaining.append((feedback_id, message))
+                pending = remaining
+
+        if OPENAI_API_KEY and pending:
+            logger.info("Feedback %s: Processing with OpenAI", [fid for fid, _ in pending])
+            _process_batch_with_openai(db, pending)
 
     except Exception as e:
-        logger.error(f"Feedback {feedback_id}: Unexpected error - {type(e).__name__}: {str(e)}", exc_info=True)
+        logger.error("Feedback %s: Unexpected error - %s: %s", feedback_ids, type(e).__name__, e, exc_info=True)
         try:
-            db.execute("UPDATE feedback SET ai_status = 'failed' WHERE id = ?", (feedback_id,))
+            db.rollback()
+            db.executemany(SET_AI_STATUS_SQL,
+                           [(AI_STATUS_CODES["failed"], feedback_id) for feedback_id in feedback_ids])
             db.commit()
         except Exception as db_error:
-            logger.error(f"Feedback {feedback_id}: Failed to update status to 'failed' - {str(db_error)}")
-    finally:
-        db.close()
+            logger.error("Feedback %s: Failed to update status to 'failed' - %s", feedback_ids, db_error)
+
+
+def _is_trivial(message):
+    """True for short or stock replies that keyword fallback handles just as well."""
+    stripped = message.strip()
+    return len(stripped) < MIN_AI_MESSAGE_LENGTH or stripped.casefold() in TRIVIAL_RESPONSES
+
+
+def _message_hash(message):
+    """16-byte digest identifying a message in ai_cache."""
+    return hashlib.blake2b(message.encode("utf-8"), digest_size=16).digest()
 
 
-def _process_with_openai(db, feedback_id, message):
+def _get_client():
+    """Return the OpenAI client shared by all workers (thread-safe, keeps HTTP connections alive)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from openai import OpenAI
+
+            # Create client with timeout
+            _client = OpenAI(
+                api_key=OPENAI_API_KEY,
+                timeout=30.0,  # 30 second timeout
+                max_retries=2   # Retry twice on transient errors
+            )
+        return _client
+
+
+def _process_batch_with_openai(db, rows):
     """
-    Process feedback using OpenAI API with comprehensive error handling.
+    Process a batch of (feedback_id, message) pairs with a single OpenAI request.
     Handles: timeout, rate limits, invalid key, quota exceeded, network errors.
+    Rows the model does not return a result for fall back to keyword processing.
     """
+    feedback_ids = [feedback_id for feedback_id, _ in rows]
     try:
-        from openai import OpenAI, APIError, APIConnectionError, RateLimitError, AuthenticationError, APITimeoutError
-        
-        # Create client with timeout
-        client = OpenAI(
-            api_key=OPENAI_API_KEY,
-            timeout=30.0,  # 30 second timeout
-            max_retries=2   # Retry twice on transient errors
-        )
+        from openai import APIError, APIConnectionError, RateLimitError, AuthenticationError, APITimeoutError
+
+        # Serve duplicates of previously analysed messages from the cache
+        hashes = {feedback_id: _message_hash(message) for feedback_id, message in rows}
+        placeholders = ",".join("?" * len(hashes))
+        cached = {
+            row[0]: row[1:]
+            for row in db.execute(SELECT_CACHED_SQL.format(placeholders), list(hashes.values()))
+        }
+        if cached:
+            hits = [(*cached[h], feedback_id) for feedback_id, h in hashes.items() if h in cached]
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany(UPDATE_RESULT_SQL, hits)
+            db.commit()
+            logger.info("Feedback %s: Reused cached analysis", [hit[-1] for hit in hits])
 
-        tags_list = ", ".join(ALLOWED_TAGS)
-        prompt = f"""Analyze this anonymous employee feedback message. Return ONLY valid JSON with these fields:
-- "detected_language": ISO 639-1 code of the original message language
-- "translation_en": English translation (if already English, copy as-is)
-- "translation_ru": Russian translation
-- "summary": 1-2 sentence summary in English (max 150 chars)
-- "tags": array of 1-3 tags from this list ONLY: [{tags_list}]
+            rows = [(feedback_id, message) for feedback_id, message in rows if hashes[feedback_id] not in cached]
+            feedback_ids = [feedback_id for feedback_id, _ in rows]
+            if not rows:
+                return
 
-Rules:
-- Only transform/structure the text, do NOT add new facts
-- Preserve cannabis terminology and slang meaning
-- Summary must reflect the key issue or idea
+        client = _get_client()
+
+        messages_json = orjson.dumps(
+            [{"id": feedback_id, "message": message} for feedback_id, message in rows]
+        ).decode()
+        prompt = _PROMPT_PREFIX + messages_json
 
-Message: \"\"\"{message}\"\"\""""
+        max_tokens = min(1000 * len(rows), 16000)
+        # Rough estimate: ~4 characters per prompt token, plus the completion budget
+        _rate_limiter.acquire(len(prompt) // 4 + max_tokens)
 
-        logger.info(f"Feedback {feedback_id}: Sending request to OpenAI")
+        logger.info("Feedback %s: Sending request to OpenAI", feedback_ids)
         response = client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"},
             temperature=0.1,
-            max_tokens=1000
+            max_tokens=max_tokens
         )
 
-        result = json.loads(response.choices[0].message.content)
-        logger.info(f"Feedback {feedback_id}: Received response from OpenAI")
-
-        # Validate and filter tags
-        tags = result.get("tags", [])
-        if isinstance(tags, list):
-            tags = [t for t in tags if t in ALLOWED_TAGS]
-            tags_str = ",".join(tags)
-        else:
-            tags_str = ""
-
-        # Update database
-        db.execute("""
-            UPDATE feedback SET
-                ai_status = 'done',
-                detected_language = ?,
-                translation_en = ?,
-                translation_ru = ?,
-                summary = ?,
-                tags = ?
-            WHERE id = ?
-        """, (
-            result.get("detected_language", "unknown"),
-            result.get("translation_en", ""),
-            result.get("translation_ru", ""),
-            result.get("summary", "")[:150],
-            tags_str,
-            feedback_id
-        ))
+        results = orjson.loads(response.choices[0].message.content).get("results", [])
+        logger.info("Feedback %s: Received response from OpenAI", feedback_ids)
+
+        by_id = {}
+        for result in results if isinstance(results, list) else []:
+            if not isinstance(result, dict):
+                continue
+            # The model sometimes echoes the ID back as a string
+            try:
+                result_id = int(result.get("id"))
+            except (TypeError, ValueError):
+                continue
+            if result_id in feedback_ids:
+                by_id[result_id] = result
+
+        updates = []
+        malformed = []
+        for feedback_id, message in rows:
+            result = by_id.get(feedback_id)
+            if result is None:
+                continue
+            try:
+                updates.append((*_parse_result(result), feedback_id))
+            except TypeError as e:
+                logger.warning("Feedback %s: Malformed result in batch response: %s", feedback_id, e)
+                malformed.append(feedback_id)
+
+        now = int(time.time())
+        cache_entries = [(hashes[update[-1]], *update[:-1], now) for update in updates]
+
+        # Update database: one prepared statement, one write transaction
+        db.execute("BEGIN IMMEDIATE")
+        db.executemany(UPDATE_RESULT_SQL, updates)
+        db.executemany(INSERT_CACHE_SQL, cache_entries)
         db.commit()
-        logger.info(f"Feedback {feedback_id}: Successfully processed with OpenAI")
+        logger.info("Feedback %s: Successfully processed with OpenAI", [update[-1] for update in updates])
+
+        # Only the rows without a usable result fall back; the rest keep the model's analysis
+        for feedback_id, message in rows:
+            if feedback_id not in by_id:
+                _fallback_on_error(db, feedback_id, message, "Missing from batch response")
+            elif feedback_id in malformed:
+                _fallback_on_error(db, feedback_id, message, "Malformed batch response")
 
     except AuthenticationError as e:
         # Invalid API key
-        logger.error(f"Feedback {feedback_id}: OpenAI authentication failed - Invalid API key: {str(e)}")
-        _fallback_on_error(db, feedback_id, message, "Authentication failed (invalid API key)")
+        logger.error("Feedback %s: OpenAI authentication failed - Invalid API key: %s", feedback_ids, e)
+        _fallback_batch_on_error(db, rows, "Authentication failed (invalid API key)")
         
     except RateLimitError as e:
         # Rate limit exceeded
-        logger.warning(f"Feedback {feedback_id}: OpenAI rate limit exceeded: {str(e)}")
-        _fallback_on_error(db, feedback_id, message, "Rate limit exceeded")
+        logger.warning("Feedback %s: OpenAI rate limit exceeded: %s", feedback_ids, e)
+        _fallback_batch_on_error(db, rows, "Rate limit exceeded")
         
     except APITimeoutError as e:
         # Request timeout
-        logger.warning(f"Feedback {feedback_id}: OpenAI request timeout: {str(e)}")
-        _fallback_on_error(db, feedback_id, message, "Request timeout")
+        logger.warning("Feedback %s: OpenAI request timeout: %s", feedback_ids, e)
+        _fallback_batch_on_error(db, rows, "Request timeout")
         
     except APIConnectionError as e:
         # Network/connection error
-        logger.warning(f"Feedback {feedback_id}: OpenAI connection error: {str(e)}")
-        _fallback_on_error(db, feedback_id, message, "Connection error")
+        logger.warning("Feedback %s: OpenAI connection error: %s", feedback_ids, e)
+        _fallback_batch_on_error(db, rows, "Connection error")
         
     except APIError as e:
         # Other API errors (quota exceeded, server error, etc.)
-        logger.error(f"Feedback {feedback_id}: OpenAI API error: {str(e)}")
-        _fallback_on_error(db, feedback_id, message, f"API error: {e.message if hasattr(e, 'message') else str(e)}")
+        logger.error("Feedback %s: OpenAI API error: %s", feedback_ids, e)
+        _fallback_batch_on_error(db, rows, f"API error: {e.message if hasattr(e, 'message') else str(e)}")
         
-    except json.JSONDecodeError as e:
+    except (orjson.JSONDecodeError, AttributeError) as e:
         # Invalid JSON response
-        logger.error(f"Feedback {feedback_id}: Failed to parse OpenAI response: {str(e)}")
-        _fallback_on_error(db, feedback_id, message, "Invalid response format")
+        logger.error("Feedback %s: Failed to parse OpenAI response: %s", feedback_ids, e)
+        _fallback_batch_on_error(db, rows, "Invalid response format")
         
     except Exception as e:
         # Unexpected errors
-        logger.error(f"Feedback {feedback_id}: Unexpected error in OpenAI processing: {type(e).__name__}: {str(e)}", exc_info=True)
-        _fallback_on_error(db, feedback_id, message, f"Unexpected error: {type(e).__name__}")
+        logger.error("Feedback %s: Unexpected error in OpenAI processing: %s: %s", feedback_ids, type(e).__name__, e, exc_info=True)
+        _fallback_batch_on_error(db, rows, f"Unexpected error: {type(e).__name__}")
+
+
+def _parse_result(result):
+    """
+    (detected_language, translation_en, translation_ru, summary, tags) from one
+    batch result. Missing or null fields get defaults; raises TypeError for values
+    of the wrong type.
+    """
+    def text(key, default=""):
+        value = result.get(key)
+        if value is None:
+            return default
+        if not isinstance(value, str):
+            raise TypeError(f"{key} is {type(value).__name__}, not str")
+        return value
+
+    # Validate and filter tags
+    tags = result.get("tags")
+    if isinstance(tags, list):
+        tags_str = ",".join(t for t in tags if isinstance(t, str) and t in ALLOWED_TAGS_SET)
+    else:
+        tags_str = ""
+
+    return (
+        text("detected_language", "unknown"),
+        text("translation_en"),
+        text("translation_ru"),
+        text("summary")[:150],
+        tags_str,
+    )
+
+
+def _fallback_batch_on_error(db, rows, error_reason):
+    """Fall back to keyword-based processing for every row of a failed batch."""
+    db.rollback()
+    for feedback_id, message in rows:
+        _fallback_on_error(db, feedback_id, message, error_reason)
 
 
 def _fallback_on_error(db, feedback_id, message, error_reason):
@@ -181,93 +474,64 @@ def _fallback_on_error(db, feedback_id, message, error_reason):
     Fallback to keyword-based processing when OpenAI fails.
     Logs the error reason and processes with fallback method.
     """
-    logger.info(f"Feedback {feedback_id}: Falling back to keyword-based processing due to: {error_reason}")
+    logger.info("Feedback %s: Falling back to keyword-based processing due to: %s", feedback_id, error_reason)
     try:
         _process_fallback(db, feedback_id, message)
     except Exception as e:
-        logger.error(f"Feedback {feedback_id}: Fallback processing also failed: {str(e)}", exc_info=True)
-        db.execute("UPDATE feedback SET ai_status = 'failed' WHERE id = ?", (feedback_id,))
+        logger.error("Feedback %s: Fallback processing also failed: %s", feedback_id, e, exc_info=True)
+        db.execute(SET_AI_STATUS_SQL, (AI_STATUS_CODES["failed"], feedback_id))
         db.commit()
 
 
-def _process_fallback(db, feedback_id, message):
-    """Fallback when no OpenAI key - basic processing with heuristics."""
-    import re
-
-    logger.info(f"Feedback {feedback_id}: Starting fallback processing")
-
+@lru_cache(maxsize=4096)
+def _fallback_analysis(message):
+    """
+    Heuristic (summary, comma-joined tags, language) for a message.
+    Pure function of the text, so repeated messages are answered from the cache.
+    """
     # Generate summary (first 150 chars)
     summary = message[:147] + "..." if len(message) > 150 else message
 
-    # Keyword-based tagging
+    # Keyword-based tagging: one regex scan, tags in order of first mention.
+    # casefold() normalises mixed-script text more thoroughly than lower()
     tags = []
-    keywords_map = {
-        "Salary": ["salary", "pay", "wage", "money", "bonus", "compensation", "เงินเดือน"],
-        "Store": ["store", "shop", "location", "branch", "ร้าน"],
-        "Product": ["product", "strain", "weed", "cannabis", "flower", "edible", "สินค้า"],
-        "Conflict": ["conflict", "fight", "argue", "bully", "harass", "toxic", "ทะเลาะ"],
-        "Legal": ["legal", "law", "license", "regulation", "กฎหมาย"],
-        "Management": ["manager", "boss", "supervisor", "lead", "ผู้จัดการ"],
-        "Schedule": ["schedule", "shift", "overtime", "hours", "time", "ตารางงาน"],
-        "Safety": ["safety", "danger", "risk", "accident", "unsafe", "ความปลอดภัย"],
-        "Training": ["training", "learn", "skill", "course", "การฝึกอบรม"],
-        "Equipment": ["equipment", "tool", "broken", "fix", "repair", "อุปกรณ์"],
-        "Customer": ["customer", "client", "complaint", "ลูกค้า"],
-        "Policy": ["policy", "rule", "procedure", "นโยบาย"],
-        "Communication": ["communication", "inform", "meeting", "การสื่อสาร"],
-        "Hygiene": ["clean", "dirty", "hygiene", "sanit", "สะอาด"],
-    }
-
-    msg_lower = message.lower()
-    for tag, kws in keywords_map.items():
-        for kw in kws:
-            if kw in msg_lower:
-                tags.append(tag)
+    for match in FALLBACK_KEYWORD_RE.finditer(message.casefold()):
+        if match.lastgroup not in tags:
+            tags.append(match.lastgroup)
+            if len(tags) >= 3:
                 break
-        if len(tags) >= 3:
-            break
 
     if not tags:
         tags = ["Other"]
 
-    logger.info(f"Feedback {feedback_id}: Detected tags: {tags}")
-
-    # Detect language (simple heuristic)
-    has_thai = bool(re.search(r'[\u0E00-\u0E7F]', message))
-    has_cyrillic = bool(re.search(r'[\u0400-\u04FF]', message))
-    has_chinese = bool(re.search(r'[\u4E00-\u9FFF]', message))
-    has_arabic = bool(re.search(r'[\u0600-\u06FF]', message))
-    
-    if has_thai:
-        detected = "th"
-    elif has_cyrillic:
-        detected = "ru"
-    elif has_chinese:
-        detected = "zh"
-    elif has_arabic:
-        detected = "ar"
-    else:
-        detected = "en"
+    # Detect language (simple heuristic): first Thai/Cyrillic/CJK/Arabic character wins
+    match = LANGUAGE_SCRIPT_RE.search(message)
+    detected = LANGUAGE_CODES[match.lastindex - 1] if match else "en"
+
+    return summary, ",".join(tags), detected
 
-    logger.info(f"Feedback {feedback_id}: Detected language: {detected}")
+
+def _process_fallback(db, feedback_id, message, commit=True):
+    """
+    Fallback when no OpenAI key - basic processing with heuristics.
+    Pass commit=False to leave the write inside the caller's transaction.
+    """
+    logger.info("Feedback %s: Starting fallback processing", feedback_id)
+
+    summary, tags, detected = _fallback_analysis(message)
+
+    logger.info("Feedback %s: Detected tags: %s", feedback_id, tags)
+    logger.info("Feedback %s: Detected language: %s", feedback_id, detected)
 
     # Update database
-    db.execute("""
-        UPDATE feedback SET
-            ai_status = 'done',
-            detected_language = ?,
-            translation_en = ?,
-            translation_ru = ?,
-            summary = ?,
-            tags = ?
-        WHERE id = ?
-    """, (
+    db.execute(UPDATE_RESULT_SQL, (
         detected,
         message if detected == "en" else f"[Auto-translation unavailable] {message}",
         f"[Требуется перевод] {message}",
         summary,
-        ",".join(tags),
+        tags,
         feedback_id
     ))
-    db.commit()
-    logger.info(f"Feedback {feedback_id}: Fallback processing completed successfully")
+    if commit:
+        db.commit()
+    logger.info("Feedback %s: Fallback processing completed successfully", feedback_id)
@@ -1,14 +1,38 @@
+import hashlib
+import hmac
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Optional
+from cachetools import TTLCache
 from jose import JWTError, jwt, ExpiredSignatureError
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.responses import RedirectResponse
 import sqlite3
 from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
-from app.database import get_db
+from app.database import get_read_db
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes use argon2id; existing bcrypt hashes still verify and are upgraded on next login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=65536,
+    argon2__parallelism=1,
+)
+
+# Validated tokens -> (user dict, token expiry), skips JWT decode + user lookup on hot paths.
+# Per process: invalidate_user_cache() only clears this process's copy, so this relies on
+# the app running as a single process (run.py starts one uvicorn worker). With more
+# workers, a role change or deactivation would stay cached in the others for up to the TTL.
+_user_cache = TTLCache(maxsize=2048, ttl=60)
+_user_cache_lock = threading.Lock()
+
+# HMAC(SECRET_KEY, user id | password hash | password) of recent successful logins,
+# so repeat logins skip argon2. Never holds the password; a new hash changes every key.
+_verified_cache = TTLCache(maxsize=1024, ttl=900)
+_verified_cache_lock = threading.Lock()
 
 
 def hash_password(password: str) -> str:
@@ -19,6 +43,39 @@ def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
 
+def _verified_key(user, plain: str) -> bytes:
+    return hmac.new(
+        SECRET_KEY.encode(),
+        f"{user['id']}|{user['password_hash']}|".encode() + plain.encode(),
+        hashlib.sha256
+    ).digest()
+
+
+def is_recently_verified(user, plain: str) -> bool:
+    """Cache-only check (one HMAC, no password hash): cheap enough for the event loop."""
+    key = _verified_key(user, plain)
+    with _verified_cache_lock:
+        return key in _verified_cache
+
+
+def verify_user_password(user, plain: str) -> bool:
+    """verify_password against a users row, skipping the hash for recently verified logins."""
+    key = _verified_key(user, plain)
+    with _verified_cache_lock:
+        if key in _verified_cache:
+            return True
+    # Failures are never cached, so a wrong password always pays the full hash cost
+    if not verify_password(plain, user["password_hash"]):
+        return False
+    with _verified_cache_lock:
+        _verified_cache[key] = True
+    return True
+
+
+def password_needs_rehash(hashed: str) -> bool:
+    return pwd_context.needs_update(hashed)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -26,7 +83,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(request: Request, db: sqlite3.Connection = Depends(get_db)):
+def invalidate_user_cache(token: Optional[str] = None, user_id: Optional[int] = None):
+    """Drop cached users for a token (logout) or for a user ID (deactivation/deletion)."""
+    with _user_cache_lock:
+        if token is not None:
+            _user_cache.pop(token, None)
+        if user_id is not None:
+            for key, (user, _) in list(_user_cache.items()):
+                if user["id"] == user_id:
+                    _user_cache.pop(key, None)
+
+
+def get_current_user(request: Request, db: sqlite3.Connection = Depends(get_read_db)):
     """
     Validate JWT token and return current user.
     Handles expired tokens, invalid tokens, and inactive users.
@@ -37,6 +105,14 @@ def get_current_user(request: Request, db: sqlite3.Connection = Depends(get_db))
             status_code=status.HTTP_302_FOUND,
             headers={"Location": "/admin/login?error=no_token"}
         )
+
+    with _user_cache_lock:
+        cached = _user_cache.get(token)
+    if cached is not None:
+        user, expires_at = cached
+        if expires_at > time.time():
+            return dict(user)
+        invalidate_user_cache(token=token)
     
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -81,6 +157,9 @@ def get_current_user(request: Request, db: sqlite3.Connection = Depends(get_db))
             }
         )
     
+    user = dict(user)
+    with _user_cache_lock:
+        _user_cache[token] = (user, payload.get("exp", 0))
     return dict(user)
 
 
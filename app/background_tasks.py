@@ -1,39 +1,52 @@
 """
 Background tasks for maintenance and cleanup
 """
-import sqlite3
 import logging
 import threading
 import time
-from datetime import datetime, timedelta
-from app.config import DATABASE_PATH
+from app.config import RATE_LIMIT_WINDOW_HOURS
+from app.database import get_connection, close_connection, optimize_db_pool, checkpoint_wal, analyze_database
 
 logger = logging.getLogger(__name__)
 
+# Rows deleted per transaction, keeps each write lock short so WAL readers aren't stalled
+CLEANUP_BATCH_SIZE = 1000
 
-def cleanup_old_rate_limits():
+# Set to stop the cleanup scheduler (wakes it from its sleep immediately)
+_stop_event = threading.Event()
+
+
+def cleanup_old_rate_limits(hours=RATE_LIMIT_WINDOW_HOURS):
     """
-    Remove rate limit entries older than 24 hours.
-    This prevents the rate_limits table from growing indefinitely.
+    Remove rate limit entries older than the rate limiting window.
+    This keeps the rate_limits table (and its indexes) small enough to stay cached.
+    
+    Args:
+        hours: Entries older than this are deleted (default: RATE_LIMIT_WINDOW_HOURS)
     """
     try:
-        db = sqlite3.connect(DATABASE_PATH)
-        cutoff = (datetime.utcnow() - timedelta(hours=24)).isoformat()
+        db = get_connection()
+        cutoff = int(time.time()) - hours * 3600
         
-        cursor = db.execute(
-            "DELETE FROM rate_limits WHERE submitted_at < ?",
-            (cutoff,)
-        )
-        deleted_count = cursor.rowcount
-        db.commit()
-        db.close()
+        deleted_count = 0
+        while True:
+            cursor = db.execute(
+                "DELETE FROM rate_limits WHERE rowid IN "
+                "(SELECT rowid FROM rate_limits WHERE submitted_at < ? LIMIT ?)",
+                (cutoff, CLEANUP_BATCH_SIZE)
+            )
+            db.commit()
+            deleted_count += cursor.rowcount
+            if cursor.rowcount < CLEANUP_BATCH_SIZE:
+                break
+        close_connection(db)
         
         if deleted_count > 0:
-            logger.info(f"Cleaned up {deleted_count} old rate limit entries")
+            logger.info("Cleaned up %s old rate limit entries", deleted_count)
         
         return deleted_count
     except Exception as e:
-        logger.error(f"Error cleaning up rate limits: {e}", exc_info=True)
+        logger.error("Error cleaning up rate limits: %s", e, exc_info=True)
         return 0
 
 
@@ -45,60 +58,101 @@ def start_cleanup_scheduler(interval_hours=1):
         interval_hours: How often to run cleanup (default: 1 hour)
     """
     def cleanup_loop():
-        logger.info(f"Started cleanup scheduler (interval: {interval_hours}h)")
-        while True:
+        logger.info("Started cleanup scheduler (interval: %sh)", interval_hours)
+        # Event.wait returns True once stop_cleanup_scheduler() is called
+        while not _stop_event.wait(interval_hours * 3600):  # Convert hours to seconds
             try:
-                time.sleep(interval_hours * 3600)  # Convert hours to seconds
                 logger.info("Running scheduled cleanup tasks...")
-                cleanup_old_rate_limits()
+                optimize_db_pool()
             except Exception as e:
-                logger.error(f"Error in cleanup scheduler: {e}", exc_info=True)
+                logger.error("Error in cleanup scheduler: %s", e, exc_info=True)
     
+    _stop_event.clear()
     thread = threading.Thread(target=cleanup_loop, daemon=True)
     thread.start()
     logger.info("Cleanup scheduler thread started")
 
 
+def start_checkpoint_scheduler(interval_minutes=5):
+    """
+    Start a background thread that expires rate limit entries and then
+    truncates the WAL periodically.
+    Stopped together with the cleanup scheduler by stop_cleanup_scheduler().
+    
+    Args:
+        interval_minutes: How often to run (default: 5 minutes)
+    """
+    def checkpoint_loop():
+        logger.info("Started WAL checkpoint scheduler (interval: %smin)", interval_minutes)
+        while not _stop_event.wait(interval_minutes * 60):
+            try:
+                cleanup_old_rate_limits()
+                checkpoint_wal()
+            except Exception as e:
+                logger.error("Error in WAL checkpoint scheduler: %s", e, exc_info=True)
+    
+    thread = threading.Thread(target=checkpoint_loop, daemon=True)
+    thread.start()
+
+
+def start_analyze_scheduler(interval_hours=24):
+    """
+    Start a background thread that runs a full ANALYZE periodically.
+    Startup only does a sampled refresh, so this keeps the statistics exact.
+    
+    Args:
+        interval_hours: How often to analyze (default: 24 hours)
+    """
+    def analyze_loop():
+        logger.info("Started ANALYZE scheduler (interval: %sh)", interval_hours)
+        while not _stop_event.wait(interval_hours * 3600):
+            try:
+                analyze_database()
+            except Exception as e:
+                logger.error("Error in ANALYZE scheduler: %s", e, exc_info=True)
+    
+    thread = threading.Thread(target=analyze_loop, daemon=True)
+    thread.start()
+
+
+def stop_cleanup_scheduler():
+    """Stop the scheduler threads without waiting for their sleep to finish."""
+    _stop_event.set()
+    logger.info("Cleanup scheduler stop requested")
+
+
 def get_rate_limit_stats():
     """
     Get statistics about rate limiting.
     Returns dict with total entries and entries by age.
     """
     try:
-        db = sqlite3.connect(DATABASE_PATH)
-        db.row_factory = sqlite3.Row
-        
-        # Total entries
-        total = db.execute("SELECT COUNT(*) as count FROM rate_limits").fetchone()['count']
-        
-        # Entries in last hour
-        one_hour_ago = (datetime.utcnow() - timedelta(hours=1)).isoformat()
-        last_hour = db.execute(
-            "SELECT COUNT(*) as count FROM rate_limits WHERE submitted_at > ?",
-            (one_hour_ago,)
-        ).fetchone()['count']
+        db = get_connection()
         
-        # Entries in last 24 hours
-        twenty_four_hours_ago = (datetime.utcnow() - timedelta(hours=24)).isoformat()
-        last_24h = db.execute(
-            "SELECT COUNT(*) as count FROM rate_limits WHERE submitted_at > ?",
-            (twenty_four_hours_ago,)
-        ).fetchone()['count']
+        now = int(time.time())
         
-        # Entries older than 24 hours (should be cleaned up)
-        old_entries = db.execute(
-            "SELECT COUNT(*) as count FROM rate_limits WHERE submitted_at < ?",
-            (twenty_four_hours_ago,)
-        ).fetchone()['count']
+        # All counts in a single pass over rate_limits
+        row = db.execute("""
+            SELECT
+                COUNT(*) AS total,
+                COALESCE(SUM(submitted_at > :one_hour_ago), 0) AS last_hour,
+                COALESCE(SUM(submitted_at > :twenty_four_hours_ago), 0) AS last_24h,
+                -- Entries older than 24 hours (should be cleaned up)
+                COALESCE(SUM(submitted_at < :twenty_four_hours_ago), 0) AS old_entries
+            FROM rate_limits
+        """, {
+            "one_hour_ago": now - 3600,
+            "twenty_four_hours_ago": now - 24 * 3600,
+        }).fetchone()
         
-        db.close()
+        close_connection(db)
         
         return {
-            'total': total,
-            'last_hour': last_hour,
-            'last_24h': last_24h,
-            'old_entries': old_entries
+            'total': row[0],
+            'last_hour': row[1],
+            'last_24h': row[2],
+            'old_entries': row[3]
         }
     except Exception as e:
-        logger.error(f"Error getting rate limit stats: {e}", exc_info=True)
+        logger.error("Error getting rate limit stats: %s", e, exc_info=True)
         return None
@@ -29,7 +29,7 @@ if not SECRET_KEY:
     SECRET_KEY = secrets.token_hex(32)
     logger.warning("Using auto-generated SECRET_KEY. Set SECRET_KEY in .env for production!")
 elif len(SECRET_KEY) < 32:
-    logger.error(f"SECRET_KEY must be at least 32 characters long (current: {len(SECRET_KEY)})")
+    logger.error("SECRET_KEY must be at least 32 characters long (current: %s)", len(SECRET_KEY))
     sys.exit(1)
 
 # ===== JWT Configuration =====
@@ -39,11 +39,17 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "480"
 # ===== Database Configuration =====
 DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "budtender.db")
 UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "uploads")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(os.cpu_count() or 4)))  # pooled request connections
 
 # ===== OpenAI Configuration =====
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 OPENAI_TIMEOUT = int(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))  # requests per minute
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "200000"))  # tokens per minute
+AI_WORKER_COUNT = int(os.getenv("AI_WORKER_COUNT", "4"))  # background AI processing threads
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "10"))  # max feedback rows per OpenAI request
+AI_BATCH_WAIT_SECONDS = float(os.getenv("AI_BATCH_WAIT_SECONDS", "2"))  # max wait to fill a batch
 
 # ===== Rate Limiting Configuration =====
 RATE_LIMIT_MAX = int(os.getenv("RATE_LIMIT_MAX", "10"))  # max submissions per IP per 24h
@@ -61,6 +67,16 @@ ALLOWED_TAGS = [
     "Management", "Schedule", "Safety", "Training", "Equipment",
     "Customer", "Policy", "Communication", "Hygiene", "Other"
 ]
+ALLOWED_TAGS_SET = frozenset(ALLOWED_TAGS)  # O(1) membership checks
+
+# Feedback enums are stored as INTEGER codes (the position in the tuple);
+# the TEXT names are generated columns derived from the codes
+FEEDBACK_CATEGORIES = ("complaint", "idea", "recommendation", "other")
+FEEDBACK_STATUSES = ("new", "read", "in_progress", "resolved", "rejected")
+AI_STATUSES = ("pending", "processing", "done", "failed")
+FEEDBACK_CATEGORY_CODES = {name: code for code, name in enumerate(FEEDBACK_CATEGORIES)}
+FEEDBACK_STATUS_CODES = {name: code for code, name in enumerate(FEEDBACK_STATUSES)}
+AI_STATUS_CODES = {name: code for code, name in enumerate(AI_STATUSES)}
 
 # ===== Security Configuration =====
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
@@ -68,10 +84,10 @@ TRUSTED_HOSTS = os.getenv("TRUSTED_HOSTS", "*").split(",")
 
 # Log configuration on startup
 if ENV == "production":
-    logger.info(f"Starting {APP_NAME} v{APP_VERSION} in PRODUCTION mode")
-    logger.info(f"Debug mode: {DEBUG}")
-    logger.info(f"Log level: {LOG_LEVEL}")
-    logger.info(f"Rate limit: {RATE_LIMIT_MAX} per {RATE_LIMIT_WINDOW_HOURS}h")
-    logger.info(f"OpenAI enabled: {bool(OPENAI_API_KEY)}")
+    logger.info("Starting %s v%s in PRODUCTION mode", APP_NAME, APP_VERSION)
+    logger.info("Debug mode: %s", DEBUG)
+    logger.info("Log level: %s", LOG_LEVEL)
+    logger.info("Rate limit: %s per %sh", RATE_LIMIT_MAX, RATE_LIMIT_WINDOW_HOURS)
+    logger.info("OpenAI enabled: %s", bool(OPENAI_API_KEY))
 else:
-    logger.debug(f"Starting {APP_NAME} v{APP_VERSION} in DEVELOPMENT mode")
+    logger.debug("Starting %s v%s in DEVELOPMENT mode", APP_NAME, APP_VERSION)
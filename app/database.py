@@ -1,140 +1,480 @@
 import sqlite3
 import os
 import logging
-from app.config import DATABASE_PATH, UPLOAD_DIR
+import queue
+import shutil
+import threading
+from contextlib import contextmanager
+from operator import itemgetter
+from app.config import (
+    DATABASE_PATH, UPLOAD_DIR, DB_POOL_SIZE, FEEDBACK_CATEGORIES, FEEDBACK_STATUSES, AI_STATUSES
+)
 
 logger = logging.getLogger(__name__)
 
+# Larger pages keep the feedback B-trees (long translation/summary rows) shallower
+PAGE_SIZE = 8192
+
+# Prepared statements kept per connection (sqlite3 default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+# Rows sampled per index by the startup statistics refresh
+ANALYSIS_LIMIT = 1000
+
+# Request connections are opened and PRAGMA-configured once, then reused
+_read_pool = queue.Queue()
+_read_pool_lock = threading.Lock()
+_read_pool_ready = False
+
+# Single writer connection, serialized by its lock
+_write_conn = None
+_write_lock = threading.Lock()
+
 
 def optimize_db_connection(db):
     """Apply production-ready SQLite optimizations"""
-    # Enable WAL mode for better concurrency
-    db.execute("PRAGMA journal_mode=WAL")
-    
-    # Enable foreign keys
-    db.execute("PRAGMA foreign_keys=ON")
-    
-    # Increase cache size (default is 2MB, set to 64MB)
-    db.execute("PRAGMA cache_size=-64000")
-    
-    # Set synchronous to NORMAL for better performance (still safe with WAL)
-    db.execute("PRAGMA synchronous=NORMAL")
-    
-    # Enable memory-mapped I/O (256MB)
-    db.execute("PRAGMA mmap_size=268435456")
-    
-    # Set temp store to memory
-    db.execute("PRAGMA temp_store=MEMORY")
-    
-    # Optimize for better query performance
-    db.execute("PRAGMA optimize")
+    # One executescript call instead of a prepare/step/finalize round-trip per PRAGMA
+    db.executescript("""
+    -- Enable WAL mode for better concurrency
+    PRAGMA journal_mode=WAL;
+    -- Enable foreign keys
+    PRAGMA foreign_keys=ON;
+    -- Increase cache size (default is 2MB, set to 64MB)
+    PRAGMA cache_size=-64000;
+    -- Set synchronous to NORMAL for better performance (still safe with WAL)
+    PRAGMA synchronous=NORMAL;
+    -- Enable memory-mapped I/O (256MB)
+    PRAGMA mmap_size=268435456;
+    -- Set temp store to memory
+    PRAGMA temp_store=MEMORY;
+    -- Wait for locks instead of failing immediately with SQLITE_BUSY
+    PRAGMA busy_timeout=5000;
+    -- Checkpoint less often (~40MB of WAL); checkpoint_wal() truncates it periodically
+    PRAGMA wal_autocheckpoint=10000;
+    -- Cap the WAL file left on disk after a checkpoint at 64MB
+    PRAGMA journal_size_limit=67108864;
+    """)
+
+
+def checkpoint_wal():
+    """Copy the WAL into the database file and truncate it (bounds read amplification and disk use)
+
+    Returns:
+        (busy, log, checkpointed) as reported by PRAGMA wal_checkpoint
+    """
+    db = get_connection()
+    try:
+        busy, log, checkpointed = db.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    finally:
+        db.close()
+    logger.info("WAL checkpoint: busy=%s log=%s checkpointed=%s", busy, log, checkpointed)
+    return busy, log, checkpointed
+
+
+def optimize_connection(db):
+    """Run PRAGMA optimize, which uses the query statistics this connection has gathered.
+
+    Belongs at close time (or periodically for long-lived connections); on a
+    fresh connection it has nothing to work with.
+    """
+    try:
+        # ANALYZE writes sqlite_stat1, so lift query_only on pooled read connections
+        read_only = db.execute("PRAGMA query_only").fetchone()[0]
+        if read_only:
+            db.execute("PRAGMA query_only=OFF")
+        try:
+            db.execute("PRAGMA optimize")
+        finally:
+            if read_only:
+                db.execute("PRAGMA query_only=ON")
+    except sqlite3.Error as e:
+        logger.warning("PRAGMA optimize failed: %s", e)
+
 
+def close_connection(db):
+    """Optimize and close a connection"""
+    optimize_connection(db)
+    db.close()
+
+
+def get_connection():
+    """Open a standalone connection (for background threads) with optimizations"""
+    db = sqlite3.connect(DATABASE_PATH, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    optimize_db_connection(db)
+    return db
+
+
+def _open_read_connection():
+    db = get_connection()
+    db.row_factory = sqlite3.Row
+    # Writes must go through get_write_db
+    db.execute("PRAGMA query_only=ON")
+    return db
 
-def get_db():
-    """Get database connection with optimizations"""
-    db = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
+
+def _open_write_connection():
+    # Autocommit mode: writers issue BEGIN IMMEDIATE explicitly, so the write
+    # lock is taken up front instead of upgrading a read lock mid-transaction
+    db = sqlite3.connect(
+        DATABASE_PATH, check_same_thread=False, isolation_level=None, cached_statements=STATEMENT_CACHE_SIZE
+    )
     db.row_factory = sqlite3.Row
     optimize_db_connection(db)
+    return db
+
+
+def _fill_read_pool():
+    """Open the pooled request connections on first use (after init_db has run)."""
+    global _read_pool_ready
+    with _read_pool_lock:
+        if not _read_pool_ready:
+            for _ in range(DB_POOL_SIZE):
+                _read_pool.put(_open_read_connection())
+            _read_pool_ready = True
+
+
+@contextmanager
+def read_connection():
+    """Borrow a pooled read-only connection until the block exits"""
+    if not _read_pool_ready:
+        _fill_read_pool()
+    db = _read_pool.get()
     try:
         yield db
     finally:
-        db.close()
+        # Never hand the next request a connection with an open transaction
+        db.rollback()
+        _read_pool.put(db)
 
 
-def init_db():
-    """Initialize database with tables, indexes, and optimizations"""
-    logger.info("Initializing database...")
-    
-    # Create directories
-    os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    
-    # Connect and optimize
-    db = sqlite3.connect(DATABASE_PATH)
-    optimize_db_connection(db)
-    
-    # Create tables
-    db.executescript("""
-    CREATE TABLE IF NOT EXISTS users (
+def get_read_db():
+    """Borrow a pooled read-only connection for the duration of a request"""
+    with read_connection() as db:
+        yield db
+
+
+@contextmanager
+def write_connection():
+    """Hold the single writer connection until the block exits"""
+    global _write_conn
+    with _write_lock:
+        if _write_conn is None:
+            _write_conn = _open_write_connection()
+        # PRAGMA optimize on other connections bumps the schema cookie; a plain
+        # read reloads the schema here, since the FTS5 triggers' nested prepare
+        # can't and fails with "no such table"
+        _write_conn.execute("SELECT 1 FROM sqlite_schema LIMIT 0")
+        try:
+            yield _write_conn
+        finally:
+            if _write_conn.in_transaction:
+                _write_conn.rollback()
+
+
+def optimize_db_pool():
+    """Run PRAGMA optimize on each pooled connection (they live for the whole process)"""
+    if _read_pool_ready:
+        for _ in range(DB_POOL_SIZE):
+            db = _read_pool.get()
+            try:
+                optimize_connection(db)
+            finally:
+                _read_pool.put(db)
+    with write_connection() as db:
+        optimize_connection(db)
+
+
+def analyze_database():
+    """Rebuild query planner statistics from every row (nightly maintenance)"""
+    with write_connection() as db:
+        db.execute("PRAGMA analysis_limit=0")
+        db.execute("ANALYZE")
+    logger.info("Full ANALYZE complete")
+
+
+def close_db_pool():
+    """Close pooled connections (application shutdown)"""
+    global _read_pool_ready, _write_conn
+    with _read_pool_lock:
+        while True:
+            try:
+                close_connection(_read_pool.get_nowait())
+            except queue.Empty:
+                break
+        _read_pool_ready = False
+    with _write_lock:
+        if _write_conn is not None:
+            close_connection(_write_conn)
+            _write_conn = None
+
+
+def _enum_name_sql(code_column, names):
+    """CASE expression mapping an INTEGER enum code to its name"""
+    whens = " ".join(f"WHEN {code} THEN '{name}'" for code, name in enumerate(names))
+    return f"CASE {code_column} {whens} END"
+
+
+def _enum_code_sql(name_column, names):
+    """CASE expression mapping an enum name to its INTEGER code"""
+    whens = " ".join(f"WHEN '{name}' THEN {code}" for code, name in enumerate(names))
+    return f"CASE {name_column} {whens} END"
+
+
+# Column definitions shared by init_db() and the table-rebuilding migrations.
+# Tables are STRICT, so only INTEGER/REAL/TEXT/BLOB/ANY column types are allowed.
+USERS_COLUMNS_SQL = """
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         email TEXT UNIQUE NOT NULL,
         password_hash TEXT NOT NULL,
         name TEXT NOT NULL,
         role TEXT NOT NULL CHECK(role IN ('admin', 'founder', 'ceo')),
         is_active INTEGER DEFAULT 1,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    """
+
+RATE_LIMITS_COLUMNS_SQL = """
+        ip_hash TEXT NOT NULL,
+        submitted_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+    """
+
+AI_CACHE_COLUMNS_SQL = """
+        msg_hash BLOB PRIMARY KEY,
+        detected_language TEXT,
+        translation_en TEXT,
+        translation_ru TEXT,
+        summary TEXT,
+        tags TEXT,
+        created_at INTEGER NOT NULL
+    """
 
-    CREATE TABLE IF NOT EXISTS feedback (
+MIGRATIONS_COLUMNS_SQL = """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        version TEXT UNIQUE NOT NULL,
+        description TEXT,
+        applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+    """
+
+ROW_COUNTS_COLUMNS_SQL = """
+        table_name TEXT PRIMARY KEY,
+        live_count INTEGER NOT NULL
+    """
+
+# Timestamp columns before 2025_feedback_epoch_timestamps (used by the older migrations)
+FEEDBACK_TEXT_TIMESTAMPS_SQL = """
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,"""
+
+# Timestamps are INTEGER Unix epoch seconds; created_at/updated_at are generated
+# 'YYYY-MM-DD HH:MM:SS' strings for templates and exports. Sort and filter on *_ts.
+FEEDBACK_EPOCH_TIMESTAMPS_SQL = """
+        created_ts INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+        updated_ts INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+        created_at TEXT GENERATED ALWAYS AS (datetime(created_ts, 'unixepoch')) VIRTUAL,
+        updated_at TEXT GENERATED ALWAYS AS (datetime(updated_ts, 'unixepoch')) VIRTUAL,"""
+
+
+def _feedback_columns_sql(timestamps_sql):
+    """feedback column definitions with the given timestamp columns"""
+    # Enum columns are INTEGER codes (see FEEDBACK_* / AI_STATUSES in app.config); the
+    # TEXT names are virtual generated columns so SELECT * and templates see the names
+    return f"""
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         submission_id TEXT UNIQUE NOT NULL,
-        category TEXT NOT NULL CHECK(category IN ('complaint', 'idea', 'recommendation', 'other')),
+        category_code INTEGER NOT NULL CHECK(category_code BETWEEN 0 AND {len(FEEDBACK_CATEGORIES) - 1}),
         message TEXT,
         photo_path TEXT,
-        status TEXT DEFAULT 'new' CHECK(status IN ('new', 'read', 'in_progress', 'resolved', 'rejected')),
+        status_code INTEGER NOT NULL DEFAULT 0 CHECK(status_code BETWEEN 0 AND {len(FEEDBACK_STATUSES) - 1}),
         ip_hash TEXT,
         user_agent TEXT,
-        ai_status TEXT DEFAULT 'pending' CHECK(ai_status IN ('pending', 'processing', 'done', 'failed')),
+        ai_status_code INTEGER NOT NULL DEFAULT 0 CHECK(ai_status_code BETWEEN 0 AND {len(AI_STATUSES) - 1}),
         translation_en TEXT,
         translation_ru TEXT,
         summary TEXT,
         tags TEXT,
         detected_language TEXT,
         private_note TEXT,
-        is_deleted INTEGER DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+        is_deleted INTEGER DEFAULT 0,{timestamps_sql}
+        category TEXT GENERATED ALWAYS AS ({_enum_name_sql("category_code", FEEDBACK_CATEGORIES)}) VIRTUAL,
+        status TEXT GENERATED ALWAYS AS ({_enum_name_sql("status_code", FEEDBACK_STATUSES)}) VIRTUAL,
+        ai_status TEXT GENERATED ALWAYS AS ({_enum_name_sql("ai_status_code", AI_STATUSES)}) VIRTUAL
+    """
 
-    CREATE TABLE IF NOT EXISTS rate_limits (
-        ip_hash TEXT NOT NULL,
-        submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+
+FEEDBACK_COLUMNS_SQL = _feedback_columns_sql(FEEDBACK_EPOCH_TIMESTAMPS_SQL)
+
+FEEDBACK_INDEXES_SQL = """
+    -- Feedback indexes
+    CREATE INDEX IF NOT EXISTS idx_feedback_ai_status ON feedback(ai_status_code);
+    
+    -- Partial indexes over live rows only; queries must say "is_deleted = 0" literally
+    CREATE INDEX IF NOT EXISTS idx_feedback_created_live ON feedback(is_deleted, created_ts DESC) WHERE is_deleted = 0;
+    -- Covers the inbox status counts and the status/category page selection (ids only;
+    -- the listing fetches the rendered columns for the selected page rows afterwards)
+    CREATE INDEX IF NOT EXISTS idx_feedback_list_cover ON feedback(is_deleted, status_code, created_ts DESC, category_code) WHERE is_deleted = 0;
+    CREATE INDEX IF NOT EXISTS idx_feedback_category_live ON feedback(category_code, created_ts DESC) WHERE is_deleted = 0;
+    """
+
+# Keep row_counts.live_count equal to COUNT(*) FROM feedback WHERE is_deleted = 0
+FEEDBACK_COUNT_TRIGGERS_SQL = """
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_count_insert AFTER INSERT ON feedback
+            WHEN NEW.is_deleted = 0
+        BEGIN
+            UPDATE row_counts SET live_count = live_count + 1 WHERE table_name = 'feedback';
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_count_delete AFTER DELETE ON feedback
+            WHEN OLD.is_deleted = 0
+        BEGIN
+            UPDATE row_counts SET live_count = live_count - 1 WHERE table_name = 'feedback';
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_count_soft_delete AFTER UPDATE OF is_deleted ON feedback
+            WHEN (OLD.is_deleted = 0) != (NEW.is_deleted = 0)
+        BEGIN
+            UPDATE row_counts SET live_count = live_count + CASE WHEN NEW.is_deleted = 0 THEN 1 ELSE -1 END
+            WHERE table_name = 'feedback';
+        END;
+"""
+
+
+# Columns searched by the admin inbox, indexed in feedback_fts
+FEEDBACK_FTS_COLUMNS = ("message", "translation_en", "translation_ru", "summary", "submission_id")
+
+# External-content FTS5 index over feedback (the text lives only in feedback). The
+# trigram tokenizer matches arbitrary substrings of 3+ characters, like LIKE '%term%'.
+FEEDBACK_FTS_SQL = f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS feedback_fts USING fts5(
+            {", ".join(FEEDBACK_FTS_COLUMNS)},
+            content='feedback', content_rowid='id', tokenize='trigram'
+        );
+"""
+
+# Keep feedback_fts in step with feedback (FTS5 'delete' needs the old values)
+FEEDBACK_FTS_TRIGGERS_SQL = f"""
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_fts_insert AFTER INSERT ON feedback
+        BEGIN
+            INSERT INTO feedback_fts (rowid, {", ".join(FEEDBACK_FTS_COLUMNS)})
+            VALUES (NEW.id, {", ".join("NEW." + c for c in FEEDBACK_FTS_COLUMNS)});
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_fts_delete AFTER DELETE ON feedback
+        BEGIN
+            INSERT INTO feedback_fts (feedback_fts, rowid, {", ".join(FEEDBACK_FTS_COLUMNS)})
+            VALUES ('delete', OLD.id, {", ".join("OLD." + c for c in FEEDBACK_FTS_COLUMNS)});
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_fts_update AFTER UPDATE OF {", ".join(FEEDBACK_FTS_COLUMNS)} ON feedback
+        BEGIN
+            INSERT INTO feedback_fts (feedback_fts, rowid, {", ".join(FEEDBACK_FTS_COLUMNS)})
+            VALUES ('delete', OLD.id, {", ".join("OLD." + c for c in FEEDBACK_FTS_COLUMNS)});
+            INSERT INTO feedback_fts (rowid, {", ".join(FEEDBACK_FTS_COLUMNS)})
+            VALUES (NEW.id, {", ".join("NEW." + c for c in FEEDBACK_FTS_COLUMNS)});
+        END;
+"""
+
+# feedback.tags ("Store,Safety") as a JSON array for json_each; tags come from ALLOWED_TAGS
+_TAGS_JSON_SQL = """'["' || replace(replace(replace({tags}, '\\', '\\\\'), '"', '\\"'), ',', '","') || '"]'"""
+
+# Keep feedback_tags (one row per feedback/tag pair) in step with feedback.tags
+FEEDBACK_TAGS_TRIGGERS_SQL = f"""
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_tags_insert AFTER INSERT ON feedback
+            WHEN NEW.tags IS NOT NULL AND NEW.tags != ''
+        BEGIN
+            INSERT OR IGNORE INTO feedback_tags (feedback_id, tag)
+                SELECT NEW.id, trim(value) FROM json_each({_TAGS_JSON_SQL.format(tags="NEW.tags")})
+                WHERE trim(value) != '';
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_tags_update AFTER UPDATE OF tags ON feedback
+        BEGIN
+            DELETE FROM feedback_tags WHERE feedback_id = OLD.id;
+            INSERT OR IGNORE INTO feedback_tags (feedback_id, tag)
+                SELECT NEW.id, trim(value) FROM json_each({_TAGS_JSON_SQL.format(tags="NEW.tags")})
+                WHERE NEW.tags IS NOT NULL AND trim(value) != '';
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_tags_delete AFTER DELETE ON feedback
+        BEGIN
+            DELETE FROM feedback_tags WHERE feedback_id = OLD.id;
+        END;
+"""
+
+def _rebuild_table_sql(table, columns_sql, columns, options="STRICT"):
+    """Script that recreates a table with a new definition and copies its rows over"""
+    column_list = ", ".join(columns)
+    return f"""
+        CREATE TABLE {table}_new ({columns_sql}) {options};
+        INSERT INTO {table}_new ({column_list}) SELECT {column_list} FROM {table};
+        DROP TABLE {table};
+        ALTER TABLE {table}_new RENAME TO {table};
+    """
+
+
+def _set_page_size(db):
+    """Use PAGE_SIZE-byte pages (one-time VACUUM for databases created with another size)"""
+    if db.execute("PRAGMA page_size").fetchone()[0] == PAGE_SIZE:
+        return
+    has_tables = db.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+    if has_tables:
+        # page_size cannot change in WAL mode; VACUUM rewrites the file with the new size
+        logger.info("Rebuilding database with %s-byte pages (one-time VACUUM)", PAGE_SIZE)
+        db.execute("PRAGMA journal_mode=DELETE")
+        db.execute(f"PRAGMA page_size={PAGE_SIZE}")
+        db.execute("VACUUM")
+    else:
+        db.execute(f"PRAGMA page_size={PAGE_SIZE}")
+
+
+def init_db():
+    """Initialize database with tables, indexes, and optimizations"""
+    logger.info("Initializing database...")
+    
+    # Create directories
+    os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    
+    # Connect and optimize
+    db = sqlite3.connect(DATABASE_PATH)
+    _set_page_size(db)
+    optimize_db_connection(db)
+    
+    # Create tables
+    db.executescript(f"""
+    CREATE TABLE IF NOT EXISTS users ({USERS_COLUMNS_SQL}) STRICT;
+
+    CREATE TABLE IF NOT EXISTS feedback ({FEEDBACK_COLUMNS_SQL}) STRICT;
+
+    -- submitted_at is Unix epoch seconds (integer range scans on the time index)
+    CREATE TABLE IF NOT EXISTS rate_limits ({RATE_LIMITS_COLUMNS_SQL}) STRICT;
+
+    -- OpenAI analyses keyed by a hash of the message, reused for duplicate submissions
+    CREATE TABLE IF NOT EXISTS ai_cache ({AI_CACHE_COLUMNS_SQL}) WITHOUT ROWID, STRICT;
 
     -- Database migrations tracking
-    CREATE TABLE IF NOT EXISTS migrations (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        version TEXT UNIQUE NOT NULL,
-        description TEXT,
-        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+    CREATE TABLE IF NOT EXISTS migrations ({MIGRATIONS_COLUMNS_SQL}) STRICT;
     """)
     
-    # Create indexes for performance
-    db.executescript("""
-    -- Feedback indexes
-    CREATE INDEX IF NOT EXISTS idx_feedback_status ON feedback(status);
-    CREATE INDEX IF NOT EXISTS idx_feedback_category ON feedback(category);
-    CREATE INDEX IF NOT EXISTS idx_feedback_created ON feedback(created_at DESC);
-    CREATE INDEX IF NOT EXISTS idx_feedback_deleted ON feedback(is_deleted);
-    CREATE INDEX IF NOT EXISTS idx_feedback_submission_id ON feedback(submission_id);
-    CREATE INDEX IF NOT EXISTS idx_feedback_ai_status ON feedback(ai_status);
+    db.commit()
     
-    -- Composite indexes for common queries
-    CREATE INDEX IF NOT EXISTS idx_feedback_status_deleted ON feedback(status, is_deleted);
-    CREATE INDEX IF NOT EXISTS idx_feedback_category_deleted ON feedback(category, is_deleted);
+    # Bring existing databases up to the current schema
+    run_migrations()
     
+    # Create indexes for performance (after migrations, which may rebuild tables)
+    db.executescript(FEEDBACK_INDEXES_SQL + """
     -- Rate limits indexes
-    CREATE INDEX IF NOT EXISTS idx_rate_limits_ip ON rate_limits(ip_hash);
     CREATE INDEX IF NOT EXISTS idx_rate_limits_time ON rate_limits(submitted_at);
     CREATE INDEX IF NOT EXISTS idx_rate_limits_ip_time ON rate_limits(ip_hash, submitted_at);
     
     -- Users indexes
-    CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
     CREATE INDEX IF NOT EXISTS idx_users_active ON users(is_active);
     """)
     
-    db.commit()
-    
     # Verify tables were created
     cursor = db.cursor()
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
     tables = [row[0] for row in cursor.fetchall()]
-    logger.info(f"Database initialized with tables: {', '.join(tables)}")
+    logger.info("Database initialized with tables: %s", ', '.join(tables))
     
-    # Run ANALYZE to update query planner statistics
-    db.execute("ANALYZE")
+    # Bounded statistics refresh: sample at most ANALYSIS_LIMIT rows per index,
+    # and only for tables whose stats are missing or stale (0x10002 = run even
+    # on a fresh connection with no query history). The full ANALYZE is nightly.
+    db.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+    db.execute("PRAGMA optimize=0x10002")
     db.commit()
     
     db.close()
@@ -142,59 +482,237 @@ def init_db():
 
 
 
-def apply_migration(version: str, description: str, sql: str):
-    """Apply a database migration"""
-    db = sqlite3.connect(DATABASE_PATH)
-    optimize_db_connection(db)
-    
-    try:
-        # Check if migration already applied
-        cursor = db.cursor()
-        cursor.execute("SELECT version FROM migrations WHERE version = ?", (version,))
-        if cursor.fetchone():
-            logger.info(f"Migration {version} already applied, skipping")
-            return
-        
-        # Apply migration
-        logger.info(f"Applying migration {version}: {description}")
-        db.executescript(sql)
-        
-        # Record migration
-        db.execute(
-            "INSERT INTO migrations (version, description) VALUES (?, ?)",
-            (version, description)
+# Schema migrations for databases created by older versions, applied in order by init_db().
+# Each one runs inside the transaction opened by apply_migration(), so no BEGIN/COMMIT here.
+MIGRATIONS = [
+    (
+        "2025_rate_limits_epoch",
+        "Store rate_limits.submitted_at as integer Unix epoch seconds",
+        """
+        CREATE TABLE rate_limits_new (
+            ip_hash TEXT NOT NULL,
+            submitted_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        );
+        INSERT INTO rate_limits_new (ip_hash, submitted_at)
+            SELECT ip_hash, CASE typeof(submitted_at)
+                WHEN 'integer' THEN submitted_at
+                ELSE COALESCE(CAST(strftime('%s', submitted_at) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER))
+            END
+            FROM rate_limits;
+        DROP TABLE rate_limits;
+        ALTER TABLE rate_limits_new RENAME TO rate_limits;
+        CREATE INDEX IF NOT EXISTS idx_rate_limits_ip ON rate_limits(ip_hash);
+        CREATE INDEX IF NOT EXISTS idx_rate_limits_time ON rate_limits(submitted_at);
+        CREATE INDEX IF NOT EXISTS idx_rate_limits_ip_time ON rate_limits(ip_hash, submitted_at);
+        """
+    ),
+    (
+        "2025_drop_redundant_indexes",
+        "Drop single-column indexes covered by composite or UNIQUE indexes",
+        """
+        DROP INDEX IF EXISTS idx_feedback_status;
+        DROP INDEX IF EXISTS idx_feedback_category;
+        DROP INDEX IF EXISTS idx_feedback_submission_id;
+        DROP INDEX IF EXISTS idx_rate_limits_ip;
+        DROP INDEX IF EXISTS idx_users_email;
+        """
+    ),
+    (
+        "2025_partial_indexes",
+        "Replace is_deleted composite indexes with partial indexes over live rows",
+        """
+        CREATE INDEX IF NOT EXISTS idx_feedback_status_live ON feedback(status, created_at DESC) WHERE is_deleted = 0;
+        CREATE INDEX IF NOT EXISTS idx_feedback_category_live ON feedback(category, created_at DESC) WHERE is_deleted = 0;
+        DROP INDEX IF EXISTS idx_feedback_status_deleted;
+        DROP INDEX IF EXISTS idx_feedback_category_deleted;
+        DROP INDEX IF EXISTS idx_feedback_deleted;
+        """
+    ),
+    (
+        "2025_feedback_row_counts",
+        "Trigger-maintained count of live feedback rows",
+        """
+        CREATE TABLE IF NOT EXISTS row_counts (
+            table_name TEXT PRIMARY KEY,
+            live_count INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        INSERT OR REPLACE INTO row_counts (table_name, live_count)
+            SELECT 'feedback', COUNT(*) FROM feedback WHERE is_deleted = 0;
+        """ + FEEDBACK_COUNT_TRIGGERS_SQL + """
+        """
+    ),
+    (
+        "2025_feedback_list_cover",
+        "Covering partial index for inbox listings; partial created_at index",
+        """
+        CREATE INDEX IF NOT EXISTS idx_feedback_created_live ON feedback(is_deleted, created_at DESC) WHERE is_deleted = 0;
+        CREATE INDEX IF NOT EXISTS idx_feedback_list_cover ON feedback(is_deleted, status, created_at DESC, category, ai_status) WHERE is_deleted = 0;
+        DROP INDEX IF EXISTS idx_feedback_created;
+        DROP INDEX IF EXISTS idx_feedback_status_live;
+        """
+    ),
+    (
+        "2025_feedback_integer_enums",
+        "Store feedback category/status/ai_status as INTEGER codes with generated TEXT names",
+        """
+        CREATE TABLE feedback_new (""" + _feedback_columns_sql(FEEDBACK_TEXT_TIMESTAMPS_SQL) + """);
+        INSERT INTO feedback_new (
+            id, submission_id, category_code, message, photo_path, status_code, ip_hash, user_agent,
+            ai_status_code, translation_en, translation_ru, summary, tags, detected_language,
+            private_note, is_deleted, created_at, updated_at
         )
-        db.commit()
-        logger.info(f"Migration {version} applied successfully")
-        
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Migration {version} failed: {e}")
-        raise
-    finally:
-        db.close()
+            SELECT id, submission_id, """ + _enum_code_sql("category", FEEDBACK_CATEGORIES) + """,
+                message, photo_path, COALESCE(""" + _enum_code_sql("status", FEEDBACK_STATUSES) + """, 0),
+                ip_hash, user_agent, COALESCE(""" + _enum_code_sql("ai_status", AI_STATUSES) + """, 0),
+                translation_en, translation_ru, summary, tags, detected_language,
+                private_note, is_deleted, created_at, updated_at
+            FROM feedback;
+        DROP TABLE feedback;
+        ALTER TABLE feedback_new RENAME TO feedback;
+        """ + FEEDBACK_COUNT_TRIGGERS_SQL + """
+        """
+    ),
+    (
+        "2025_strict_tables",
+        "Recreate all tables as STRICT (TIMESTAMP columns become TEXT)",
+        """
+        DROP TRIGGER IF EXISTS trg_feedback_count_insert;
+        DROP TRIGGER IF EXISTS trg_feedback_count_delete;
+        DROP TRIGGER IF EXISTS trg_feedback_count_soft_delete;
+        """
+        + _rebuild_table_sql("users", USERS_COLUMNS_SQL, (
+            "id", "email", "password_hash", "name", "role", "is_active", "created_at", "updated_at"))
+        + _rebuild_table_sql("feedback", _feedback_columns_sql(FEEDBACK_TEXT_TIMESTAMPS_SQL), (
+            "id", "submission_id", "category_code", "message", "photo_path", "status_code", "ip_hash",
+            "user_agent", "ai_status_code", "translation_en", "translation_ru", "summary", "tags",
+            "detected_language", "private_note", "is_deleted", "created_at", "updated_at"))
+        + _rebuild_table_sql("rate_limits", RATE_LIMITS_COLUMNS_SQL, ("ip_hash", "submitted_at"))
+        + _rebuild_table_sql("ai_cache", AI_CACHE_COLUMNS_SQL, (
+            "msg_hash", "detected_language", "translation_en", "translation_ru", "summary", "tags",
+            "created_at"), options="WITHOUT ROWID, STRICT")
+        + _rebuild_table_sql("migrations", MIGRATIONS_COLUMNS_SQL, ("id", "version", "description", "applied_at"))
+        + _rebuild_table_sql("row_counts", ROW_COUNTS_COLUMNS_SQL, ("table_name", "live_count"),
+                             options="WITHOUT ROWID, STRICT")
+        # Indexes are recreated by init_db() once migrations have run
+        + FEEDBACK_COUNT_TRIGGERS_SQL
+    ),
+    (
+        "2025_feedback_epoch_timestamps",
+        "Store feedback created/updated times as INTEGER epoch seconds with generated TEXT columns",
+        """
+        CREATE TABLE feedback_new (""" + FEEDBACK_COLUMNS_SQL + """) STRICT;
+        INSERT INTO feedback_new (
+            id, submission_id, category_code, message, photo_path, status_code, ip_hash, user_agent,
+            ai_status_code, translation_en, translation_ru, summary, tags, detected_language,
+            private_note, is_deleted, created_ts, updated_ts
+        )
+            SELECT id, submission_id, category_code, message, photo_path, status_code, ip_hash, user_agent,
+                ai_status_code, translation_en, translation_ru, summary, tags, detected_language,
+                private_note, is_deleted,
+                COALESCE(CAST(strftime('%s', created_at) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER)),
+                COALESCE(CAST(strftime('%s', updated_at) AS INTEGER), CAST(strftime('%s', created_at) AS INTEGER),
+                         CAST(strftime('%s', 'now') AS INTEGER))
+            FROM feedback;
+        DROP TABLE feedback;
+        ALTER TABLE feedback_new RENAME TO feedback;
+        """ + FEEDBACK_COUNT_TRIGGERS_SQL
+    ),
+    (
+        "2025_feedback_fts",
+        "FTS5 trigram index over feedback text for inbox search",
+        FEEDBACK_FTS_SQL + FEEDBACK_FTS_TRIGGERS_SQL + """
+        INSERT INTO feedback_fts (feedback_fts) VALUES ('rebuild');
+        """
+    ),
+    (
+        "2025_feedback_tags",
+        "Trigger-maintained feedback_tags table for tag analytics",
+        """
+        CREATE TABLE IF NOT EXISTS feedback_tags (
+            feedback_id INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (feedback_id, tag)
+        ) WITHOUT ROWID, STRICT;
+        CREATE INDEX IF NOT EXISTS idx_feedback_tags_tag ON feedback_tags(tag);
+        INSERT OR IGNORE INTO feedback_tags (feedback_id, tag)
+            SELECT feedback.id, trim(tag_list.value)
+            FROM feedback, json_each(""" + _TAGS_JSON_SQL.format(tags="feedback.tags") + """) AS tag_list
+            WHERE feedback.tags IS NOT NULL AND feedback.tags != '' AND trim(tag_list.value) != '';
+        """ + FEEDBACK_TAGS_TRIGGERS_SQL
+    ),
+    # init_db() recreates the index from FEEDBACK_INDEXES_SQL right after the migrations
+    (
+        "2025_feedback_list_cover_narrow",
+        "Rebuild the inbox listing index without the unused ai_status_code column",
+        """
+        DROP INDEX IF EXISTS idx_feedback_list_cover;
+        """
+    ),
+]
+
+
+def run_migrations():
+    """Apply all pending migrations from MIGRATIONS"""
+    for version, description, sql in MIGRATIONS:
+        apply_migration(version, description, sql)
+
+
+def _split_sql(script: str):
+    """Yield the complete statements of a script (trigger bodies stay whole)"""
+    statement = ""
+    for part in script.split(";"):
+        statement += part + ";"
+        if sqlite3.complete_statement(statement):
+            if statement.strip(" \t\n;"):
+                yield statement
+            statement = ""
+
+
+def apply_migration(version: str, description: str, sql: str):
+    """Apply a database migration exactly once, in a single transaction"""
+    with write_connection() as db:
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            # Recording the version is the gate: no row inserted means already applied
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO migrations (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            if cursor.rowcount == 0:
+                db.rollback()
+                logger.info("Migration %s already applied, skipping", version)
+                return
+
+            # executescript() would commit first, so run the statements one by one
+            logger.info("Applying migration %s: %s", version, description)
+            for statement in _split_sql(sql):
+                db.execute(statement)
+            db.commit()
+            logger.info("Migration %s applied successfully", version)
+
+        except Exception as e:
+            logger.error("Migration %s failed: %s", version, e)
+            raise
 
 
 def get_applied_migrations():
     """Get list of applied migrations"""
-    db = sqlite3.connect(DATABASE_PATH)
-    cursor = db.cursor()
-    cursor.execute("SELECT version, description, applied_at FROM migrations ORDER BY applied_at")
-    migrations = cursor.fetchall()
-    db.close()
-    return migrations
+    with read_connection() as db:
+        cursor = db.execute("SELECT version, description, applied_at FROM migrations ORDER BY applied_at")
+        return [tuple(row) for row in cursor]
 
 
-def backup_database(backup_path: str = None):
+def backup_database(backup_path: str = None, pages: int = 1024, compact: bool = False):
     """Create a backup of the database
     
     Args:
         backup_path: Path to backup file. If None, generates timestamped backup.
+        pages: Pages copied per backup step (fewer steps means fewer lock round-trips)
+        compact: Write a defragmented copy with VACUUM INTO (live pages only, slower)
     
     Returns:
         Path to backup file
     """
-    import shutil
     from datetime import datetime
     
     if backup_path is None:
@@ -204,24 +722,75 @@ def backup_database(backup_path: str = None):
         backup_path = os.path.join(backup_dir, f"budtender_backup_{timestamp}.db")
     
     try:
-        # Use SQLite backup API for safe backup
-        source = sqlite3.connect(DATABASE_PATH)
-        backup = sqlite3.connect(backup_path)
-        
-        with backup:
-            source.backup(backup)
-        
-        source.close()
-        backup.close()
+        if compact:
+            # Rebuilds every table and index into the new file; reads one WAL snapshot
+            db = get_connection()
+            db.execute("VACUUM INTO ?", (backup_path,))
+            db.close()
+        # Fast path: checkpoint the WAL into the main file and copy it in the kernel
+        elif not _copy_checkpointed_database(backup_path):
+            # Source is busy: use SQLite backup API for safe backup
+            source = sqlite3.connect(DATABASE_PATH)
+            backup = sqlite3.connect(backup_path)
+            
+            source.backup(backup, pages=pages, sleep=0, progress=_log_backup_progress)
+            
+            source.close()
+            backup.close()
         
-        logger.info(f"Database backed up to: {backup_path}")
+        logger.info("Database backed up to: %s", backup_path)
         return backup_path
         
     except Exception as e:
-        logger.error(f"Backup failed: {e}")
+        logger.error("Backup failed: %s", e)
         raise
 
 
+def _copy_checkpointed_database(backup_path):
+    """Copy the database file directly once the WAL is fully checkpointed.
+
+    Holds the write lock during the copy so no commit (and therefore no
+    checkpoint) can change the main file. Returns False if the WAL could not
+    be emptied, in which case the caller falls back to the backup API.
+    """
+    db = sqlite3.connect(DATABASE_PATH, isolation_level=None)
+    try:
+        busy, _, _ = db.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        if busy:
+            return False
+
+        db.execute("BEGIN IMMEDIATE")
+        wal_path = DATABASE_PATH + "-wal"
+        if os.path.exists(wal_path) and os.path.getsize(wal_path) > 0:
+            # A writer committed between the checkpoint and taking the lock
+            return False
+
+        with open(DATABASE_PATH, "rb") as src, open(backup_path, "wb") as dst:
+            try:
+                # Kernel-side copy (reflink on btrfs/xfs)
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except (AttributeError, OSError):
+                # copy_file_range unavailable or unsupported across these filesystems
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+                shutil.copyfileobj(src, dst)
+        return True
+    finally:
+        if db.in_transaction:
+            db.rollback()
+        db.close()
+
+
+def _log_backup_progress(status, remaining, total):
+    logger.debug("Backup progress: %s/%s pages copied", total - remaining, total)
+
+
 def cleanup_old_backups(keep_count: int = 7):
     """Keep only the N most recent backups
     
@@ -233,50 +802,65 @@ def cleanup_old_backups(keep_count: int = 7):
     if not os.path.exists(backup_dir):
         return
     
-    # Get all backup files
-    backups = []
-    for filename in os.listdir(backup_dir):
-        if filename.startswith("budtender_backup_") and filename.endswith(".db"):
-            filepath = os.path.join(backup_dir, filename)
-            backups.append((filepath, os.path.getmtime(filepath)))
+    # Get all backup files (scandir entries carry their type, so only mtime needs a stat)
+    with os.scandir(backup_dir) as entries:
+        backups = [
+            (entry.path, entry.stat().st_mtime)
+            for entry in entries
+            if entry.name.startswith("budtender_backup_") and entry.name.endswith(".db") and entry.is_file()
+        ]
     
     # Sort by modification time (newest first)
-    backups.sort(key=lambda x: x[1], reverse=True)
+    backups.sort(key=itemgetter(1), reverse=True)
     
     # Delete old backups
     for filepath, _ in backups[keep_count:]:
         try:
             os.remove(filepath)
-            logger.info(f"Deleted old backup: {filepath}")
+            logger.info("Deleted old backup: %s", filepath)
         except Exception as e:
-            logger.error(f"Failed to delete backup {filepath}: {e}")
+            logger.error("Failed to delete backup %s: %s", filepath, e)
 
 
-def verify_database_integrity():
+def verify_database_integrity(quick: bool = True):
     """Verify database integrity
     
+    Args:
+        quick: Run PRAGMA quick_check (skips index/table cross-checks, much less I/O).
+            Use verify_database_deep() for the full integrity_check.
+    
     Returns:
         True if database is OK, False otherwise
     """
+    return _run_integrity_check("quick_check" if quick else "integrity_check")
+
+
+def verify_database_deep():
+    """Run the full PRAGMA integrity_check (for weekly scheduled runs)"""
+    return _run_integrity_check("integrity_check")
+
+
+def _run_integrity_check(pragma):
     try:
         db = sqlite3.connect(DATABASE_PATH)
-        cursor = db.cursor()
-        
-        # Run integrity check
-        cursor.execute("PRAGMA integrity_check")
-        result = cursor.fetchone()[0]
-        
-        db.close()
-        
-        if result == "ok":
-            logger.info("Database integrity check: OK")
-            return True
-        else:
-            logger.error(f"Database integrity check failed: {result}")
+        try:
+            cursor = db.execute(f"PRAGMA {pragma}")
+            rows = cursor.fetchmany(100)
+            if rows and rows[0][0] == "ok":
+                logger.info("Database %s: OK", pragma)
+                return True
+            
+            # One row per problem found; stream them instead of buffering the whole list
+            while rows:
+                for (problem,) in rows:
+                    logger.error("Database %s failed: %s", pragma, problem)
+                rows = cursor.fetchmany(100)
             return False
+        finally:
+            db.close()
             
     except Exception as e:
-        logger.error(f"Database integrity check error: {e}")
+        logger.error("Database integrity check error: %s", e)
         return False
 
 
@@ -286,35 +870,44 @@ def get_database_stats():
     Returns:
         Dictionary with database statistics
     """
-    db = sqlite3.connect(DATABASE_PATH)
-    cursor = db.cursor()
-    
-    stats = {}
-    
-    # Get table counts
-    cursor.execute("SELECT COUNT(*) FROM users")
-    stats['users_count'] = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM feedback WHERE is_deleted = 0")
-    stats['feedback_count'] = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM rate_limits")
-    stats['rate_limits_count'] = cursor.fetchone()[0]
-    
-    # Get database size
-    cursor.execute("PRAGMA page_count")
-    page_count = cursor.fetchone()[0]
-    cursor.execute("PRAGMA page_size")
-    page_size = cursor.fetchone()[0]
-    stats['database_size_mb'] = (page_count * page_size) / (1024 * 1024)
-    
-    # Get WAL size if exists
-    wal_path = DATABASE_PATH + "-wal"
-    if os.path.exists(wal_path):
-        stats['wal_size_mb'] = os.path.getsize(wal_path) / (1024 * 1024)
-    else:
-        stats['wal_size_mb'] = 0
-    
-    db.close()
-    
+    with read_connection() as db:
+        cursor = db.cursor()
+        
+        stats = {}
+        
+        # Get table counts
+        cursor.execute("SELECT COUNT(*) FROM users")
+        stats['users_count'] = cursor.fetchone()[0]
+        
+        # Maintained by the trg_feedback_count_* triggers
+        cursor.execute("SELECT live_count FROM row_counts WHERE table_name = 'feedback'")
+        stats['feedback_count'] = cursor.fetchone()[0]
+        
+        # Estimate from the last ANALYZE (first number in stat is the table's row count).
+        # sqlite_stat1 doesn't exist until an ANALYZE has found something to record.
+        try:
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = 'rate_limits' LIMIT 1")
+            row = cursor.fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        if row:
+            stats['rate_limits_count'] = int(row[0].split()[0])
+        else:
+            cursor.execute("SELECT COUNT(*) FROM rate_limits")
+            stats['rate_limits_count'] = cursor.fetchone()[0]
+        
+        # Get database size
+        cursor.execute("PRAGMA page_count")
+        page_count = cursor.fetchone()[0]
+        cursor.execute("PRAGMA page_size")
+        page_size = cursor.fetchone()[0]
+        stats['database_size_mb'] = (page_count * page_size) / (1024 * 1024)
+        
+        # Get WAL size if exists
+        wal_path = DATABASE_PATH + "-wal"
+        if os.path.exists(wal_path):
+            stats['wal_size_mb'] = os.path.getsize(wal_path) / (1024 * 1024)
+        else:
+            stats['wal_size_mb'] = 0
+        
     return stats
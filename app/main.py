@@ -1,17 +1,20 @@
+import asyncio
 import hashlib
 import os
-import random
-import string
+import secrets
 import csv
 import io
-from datetime import datetime, timedelta
+import orjson
+from datetime import datetime
+from html import escape as html_escape
 from typing import Optional
 
 from fastapi import FastAPI, Request, Depends, Form, UploadFile, File, HTTPException, Query
-from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.exceptions import RequestValidationError
+from jinja2 import FileSystemBytecodeCache
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import sqlite3
 import logging
@@ -20,22 +23,57 @@ import logging
 logger = logging.getLogger(__name__)
 
 from app.config import (
-    SECRET_KEY, RATE_LIMIT_MAX, MAX_FILE_SIZE, UPLOAD_DIR, ALLOWED_TAGS
+    SECRET_KEY, RATE_LIMIT_MAX, RATE_LIMIT_WINDOW_HOURS, MAX_FILE_SIZE, UPLOAD_DIR, ALLOWED_TAGS,
+    FEEDBACK_CATEGORY_CODES, FEEDBACK_STATUS_CODES
 )
-from app.database import init_db, get_db
+from app.database import init_db, get_read_db, read_connection, write_connection, close_db_pool
 from app.auth import (
-    hash_password, verify_password, create_access_token,
-    get_current_user, require_role
+    hash_password, verify_user_password, is_recently_verified, password_needs_rehash, create_access_token,
+    get_current_user, require_role, invalidate_user_cache
 )
 from app.ai_pipeline import process_feedback_async
-from app.background_tasks import start_cleanup_scheduler, cleanup_old_rate_limits
+from app.background_tasks import (
+    start_cleanup_scheduler, start_checkpoint_scheduler, start_analyze_scheduler,
+    stop_cleanup_scheduler, cleanup_old_rate_limits
+)
 
-app = FastAPI(title="Budtender Feedback System")
+app = FastAPI(title="Budtender Feedback System", default_response_class=ORJSONResponse)
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "app", "static")), name="static")
 app.mount("/uploads", StaticFiles(directory=os.path.join(BASE_DIR, "data", "uploads")), name="uploads")
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "app", "templates"))
+# Persist compiled templates so new worker processes skip parse/compile
+# (default location is a per-user directory under the system temp dir)
+templates.env.bytecode_cache = FileSystemBytecodeCache()
+
+# Current Unix time computed by SQLite, for updated_ts (same expression as the column default)
+NOW_TS_SQL = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+# Statements on the public submission path. The sqlite3 statement cache
+# (STATEMENT_CACHE_SIZE per connection) is keyed by the SQL text, so these
+# are compiled once per connection and reused
+# rate_limits.submitted_at is Unix epoch seconds; the window start is computed
+# by SQLite and the lookup is a range scan on idx_rate_limits_ip_time
+RATE_LIMIT_COUNT_SQL = (
+    "SELECT COUNT(*) FROM rate_limits WHERE ip_hash = ? "
+    f"AND submitted_at > {NOW_TS_SQL} - {RATE_LIMIT_WINDOW_HOURS * 3600}"
+)
+INSERT_FEEDBACK_SQL = """
+    INSERT INTO feedback (submission_id, category_code, message, photo_path, ip_hash, user_agent)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(submission_id) DO NOTHING
+"""
+INSERT_RATE_LIMIT_SQL = "INSERT INTO rate_limits (ip_hash) VALUES (?)"
+
+# bulk_status: the IDs are bound as a single JSON array
+BULK_STATUS_SQL = (
+    f"UPDATE feedback SET status_code = ?, updated_ts = {NOW_TS_SQL} "
+    "WHERE id IN (SELECT value FROM json_each(?))"
+)
+
+# Inbox searches at least this long use the trigram FTS index (shorter ones scan)
+FTS_MIN_SEARCH_LENGTH = 3
 
 
 # ==================== GLOBAL EXCEPTION HANDLERS ====================
@@ -46,7 +84,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     if exc.status_code == 404:
         # Check if it's an API request or web request
         if request.url.path.startswith("/api/"):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={"detail": "Resource not found"}
             )
@@ -57,7 +95,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         )
     elif exc.status_code == 403:
         if request.url.path.startswith("/api/"):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=403,
                 content={"detail": exc.detail or "Access forbidden"}
             )
@@ -69,7 +107,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     else:
         # For other HTTP errors, return JSON or generic error page
         if request.url.path.startswith("/api/"):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=exc.status_code,
                 content={"detail": exc.detail}
             )
@@ -83,9 +121,9 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors (422)"""
-    logger.warning(f"Validation error: {exc.errors()}")
+    logger.warning("Validation error: %s", exc.errors())
     if request.url.path.startswith("/api/"):
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=422,
             content={"detail": exc.errors()}
         )
@@ -99,9 +137,9 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle all uncaught exceptions (500)"""
-    logger.error(f"Unhandled exception: {type(exc).__name__}: {str(exc)}", exc_info=True)
+    logger.error("Unhandled exception: %s: %s", type(exc).__name__, exc, exc_info=True)
     if request.url.path.startswith("/api/"):
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"detail": "Internal server error"}
         )
@@ -116,43 +154,84 @@ async def general_exception_handler(request: Request, exc: Exception):
 def startup():
     init_db()
     _seed_admin()
-    # Start background cleanup scheduler (runs every hour)
+    # Start background maintenance scheduler (runs every hour)
     start_cleanup_scheduler(interval_hours=1)
+    # Expire rate limit entries and truncate the WAL every 5 minutes
+    start_checkpoint_scheduler(interval_minutes=5)
+    # Full ANALYZE once a day (startup only samples)
+    start_analyze_scheduler(interval_hours=24)
     # Run initial cleanup
     cleanup_old_rate_limits()
     logger.info("Application startup complete")
 
 
+@app.on_event("shutdown")
+def shutdown():
+    stop_cleanup_scheduler()
+    close_db_pool()
+
+
+# PRAGMA user_version once the default accounts have been seeded
+SEEDED_USER_VERSION = 1
+
+
 def _seed_admin():
-    """Create default admin if no users exist."""
-    db = sqlite3.connect(os.path.join(BASE_DIR, "data", "budtender.db"))
-    count = db.execute("SELECT COUNT(*) FROM users").fetchone()[0]
-    if count == 0:
-        db.execute(
-            "INSERT INTO users (email, password_hash, name, role) VALUES (?, ?, ?, ?)",
-            ("admin@weeden.com", hash_password("admin12345!"), "System Admin", "admin")
-        )
-        db.execute(
-            "INSERT INTO users (email, password_hash, name, role) VALUES (?, ?, ?, ?)",
-            ("founder@weeden.com", hash_password("founder12345"), "Founder", "founder")
-        )
-        db.execute(
-            "INSERT INTO users (email, password_hash, name, role) VALUES (?, ?, ?, ?)",
-            ("ceo@weeden.com", hash_password("ceo1234567!"), "CEO", "ceo")
-        )
+    """Create default admin if no users exist (checked once per database)."""
+    with write_connection() as db:
+        # Set after the first check, so later boots skip the users lookup entirely
+        if db.execute("PRAGMA user_version").fetchone()[0] >= SEEDED_USER_VERSION:
+            return
+        db.execute("BEGIN IMMEDIATE")
+        if db.execute("SELECT 1 FROM users LIMIT 1").fetchone() is None:
+            db.execute(
+                "INSERT INTO users (email, password_hash, name, role) VALUES (?, ?, ?, ?)",
+                ("admin@weeden.com", hash_password("admin12345!"), "System Admin", "admin")
+            )
+            db.execute(
+                "INSERT INTO users (email, password_hash, name, role) VALUES (?, ?, ?, ?)",
+                ("founder@weeden.com", hash_password("founder12345"), "Founder", "founder")
+            )
+            db.execute(
+                "INSERT INTO users (email, password_hash, name, role) VALUES (?, ?, ?, ?)",
+                ("ceo@weeden.com", hash_password("ceo1234567!"), "CEO", "ceo")
+            )
+        db.execute(f"PRAGMA user_version = {SEEDED_USER_VERSION}")
         db.commit()
-    db.close()
+
+
+# Key for the IP hash, derived once instead of on every submission
+_IP_HASH_KEY = SECRET_KEY[:16].encode()
 
 
 def _hash_ip(ip: str) -> str:
-    salt = SECRET_KEY[:16]
-    return hashlib.sha256(f"{salt}{ip}".encode()).hexdigest()
+    # Keyed BLAKE2b (stdlib), 32-byte digest -> 64 hex chars like the old SHA-256 hash
+    return hashlib.blake2b(ip.encode(), key=_IP_HASH_KEY, digest_size=32).hexdigest()
+
+
+# Collisions are rare until the 100000 IDs fill up; then give up instead of spinning
+SUBMISSION_ID_ATTEMPTS = 5
 
 
 def _generate_submission_id() -> str:
-    nums = ''.join(random.choices(string.digits, k=3))
-    nums2 = ''.join(random.choices(string.digits, k=2))
-    return f"WDN-{nums}-{nums2}"
+    # One CSPRNG draw for both digit groups: WDN-000-00 .. WDN-999-99
+    return "WDN-%03d-%02d" % divmod(secrets.randbelow(100000), 100)
+
+
+# libmagic cookie, loaded once (loading the magic database costs milliseconds)
+try:
+    import magic
+    _magic = magic.Magic(mime=True)
+except ImportError:
+    _magic = None
+
+# libmagic only needs the start of the file to identify it
+MAGIC_SNIFF_BYTES = 4096
+
+# Accepted file signatures (magic bytes)
+_IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',                          # JPEG/JFIF: FF D8 FF
+    b'\x89\x50\x4e\x47\x0d\x0a\x1a\x0a',  # PNG: 89 50 4E 47 0D 0A 1A 0A
+)
 
 
 def _validate_image_signature(content: bytes) -> bool:
@@ -163,28 +242,79 @@ def _validate_image_signature(content: bytes) -> bool:
     if len(content) < 12:
         return False
     
-    # JPEG signatures
-    # FF D8 FF (JPEG/JFIF)
-    if content[:3] == b'\xff\xd8\xff':
-        return True
-    
-    # PNG signature
-    # 89 50 4E 47 0D 0A 1A 0A
-    if content[:8] == b'\x89\x50\x4e\x47\x0d\x0a\x1a\x0a':
-        return True
-    
-    return False
+    # Single C-level prefix check against both signatures, no slice copies
+    return content.startswith(_IMAGE_SIGNATURES)
+
+
+def _write_upload(filepath: str, content: bytes):
+    # "x": never overwrite an existing upload
+    with open(filepath, "xb") as f:
+        f.write(content)
+
+
+def _remove_upload(filepath: str):
+    try:
+        os.remove(filepath)
+    except OSError as e:
+        logger.error("Failed to delete upload %s: %s", filepath, e)
 
 
-def _check_rate_limit(db: sqlite3.Connection, ip_hash: str) -> bool:
-    cutoff = (datetime.utcnow() - timedelta(hours=24)).isoformat()
-    count = db.execute(
-        "SELECT COUNT(*) FROM rate_limits WHERE ip_hash = ? AND submitted_at > ?",
-        (ip_hash, cutoff)
-    ).fetchone()[0]
+def _write(sql: str, params=()) -> int:
+    """
+    Run one statement in its own transaction on the writer connection.
+    Blocking (waits for the writer lock): call it through asyncio.to_thread.
+    """
+    with write_connection() as db:
+        db.execute("BEGIN IMMEDIATE")
+        cursor = db.execute(sql, params)
+        db.commit()
+        return cursor.rowcount
+
+
+def _check_rate_limit(ip_hash: str) -> bool:
+    """Blocking (borrows a pooled read connection): call it through asyncio.to_thread."""
+    with read_connection() as db:
+        count = db.execute(RATE_LIMIT_COUNT_SQL, (ip_hash,)).fetchone()[0]
     return count < RATE_LIMIT_MAX
 
 
+# Returned by _insert_feedback when the IP hit the limit while the request was in flight
+RATE_LIMITED = object()
+
+
+def _insert_feedback(category_code: int, message: str, photo_path, ip_hash: str, user_agent: str):
+    """
+    Insert a submission and its rate-limit entry in one write transaction.
+    Returns (feedback_id, submission_id), RATE_LIMITED if the IP is over the limit,
+    or None if no free submission ID was found.
+    Blocking: call it through asyncio.to_thread.
+    """
+    with write_connection() as db:
+        db.execute("BEGIN IMMEDIATE")
+        # Recount under the write lock: the read-pool check is only a pre-filter,
+        # and concurrent submits from one IP would all pass it
+        if db.execute(RATE_LIMIT_COUNT_SQL, (ip_hash,)).fetchone()[0] >= RATE_LIMIT_MAX:
+            db.rollback()
+            return RATE_LIMITED
+        # submission_id is UNIQUE, so a collision inserts nothing and we retry
+        for _ in range(SUBMISSION_ID_ATTEMPTS):
+            submission_id = _generate_submission_id()
+            cursor = db.execute(
+                INSERT_FEEDBACK_SQL,
+                (submission_id, category_code, message, photo_path, ip_hash, user_agent)
+            )
+            if cursor.rowcount:
+                break
+        else:
+            db.rollback()
+            return None
+        feedback_id = cursor.lastrowid
+
+        db.execute(INSERT_RATE_LIMIT_SQL, (ip_hash,))
+        db.commit()
+    return feedback_id, submission_id
+
+
 # ==================== PUBLIC FORM ====================
 
 @app.get("/", response_class=HTMLResponse)
@@ -193,10 +323,9 @@ async def public_form(request: Request):
 
 
 @app.post("/submit", response_class=HTMLResponse)
-async def submit_feedback(
-    request: Request,
-    db: sqlite3.Connection = Depends(get_db)
-):
+async def submit_feedback(request: Request):
+    # Parsing, validation and the upload write hold no database connection;
+    # the writer is taken only for the INSERTs at the end
     form = await request.form()
     category = form.get("category", "")
     message = form.get("message", "")
@@ -211,11 +340,12 @@ async def submit_feedback(
     client_ip = request.client.host if request.client else "unknown"
     ip_hash = _hash_ip(client_ip)
 
-    if not _check_rate_limit(db, ip_hash):
-        return templates.TemplateResponse("public/rate_limited.html", {"request": request})
+    # Cheap early rejection; _insert_feedback enforces the limit atomically
+    if not await asyncio.to_thread(_check_rate_limit, ip_hash):
+        return templates.TemplateResponse("public/rate_limited.html", {"request": request}, status_code=429)
 
     # Validate category
-    if category not in ("complaint", "idea", "recommendation", "other"):
+    if category not in FEEDBACK_CATEGORY_CODES:
         raise HTTPException(status_code=400, detail="Invalid category")
 
     # Validate message
@@ -227,8 +357,7 @@ async def submit_feedback(
     
     # Sanitize message - escape HTML to prevent XSS
     # Note: Jinja2 auto-escapes by default, but we sanitize here for extra safety
-    import html
-    message = html.escape(message.strip())
+    message = html_escape(message.strip())
 
     # Validate and process photo upload
     photo_path = None
@@ -247,52 +376,44 @@ async def submit_feedback(
         if ext not in ("jpg", "jpeg", "png"):
             raise HTTPException(status_code=400, detail="Only JPG/PNG images allowed")
 
-        # Validate MIME type using python-magic
-        try:
-            import magic
-            mime = magic.from_buffer(content, mime=True)
-            allowed_mimes = ["image/jpeg", "image/png"]
-            
-            if mime not in allowed_mimes:
+        # Validate file signature (magic bytes); libmagic identifies JPEG/PNG by the
+        # same leading bytes, so it is only consulted to name the type of a rejected file
+        if not _validate_image_signature(content):
+            if _magic is not None:
+                mime = _magic.from_buffer(content[:MAGIC_SNIFF_BYTES])
                 raise HTTPException(
                     status_code=400, 
                     detail=f"Invalid file type. Only JPEG and PNG images allowed (detected: {mime})"
                 )
-        except ImportError:
-            # Fallback if python-magic not available
-            # Check file signature (magic bytes)
-            if not _validate_image_signature(content):
-                raise HTTPException(
-                    status_code=400,
-                    detail="Invalid image file. File signature check failed"
-                )
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid image file. File signature check failed"
+            )
 
         # Generate safe filename (no user input in filename)
-        filename = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{random.randint(1000,9999)}.{ext}"
+        # 32 random bits per second of timestamp: collisions are practically impossible
+        filename = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(4)}.{ext}"
         filepath = os.path.join(UPLOAD_DIR, filename)
         
-        # Write file
-        with open(filepath, "wb") as f:
-            f.write(content)
+        # Write file off the event loop (up to MAX_FILE_SIZE bytes)
+        await asyncio.to_thread(_write_upload, filepath, content)
         photo_path = filename
 
-    # Generate unique submission ID
-    submission_id = _generate_submission_id()
-    while db.execute("SELECT 1 FROM feedback WHERE submission_id = ?", (submission_id,)).fetchone():
-        submission_id = _generate_submission_id()
-
     user_agent = request.headers.get("user-agent", "")[:500]
 
-    # Insert feedback
-    db.execute("""
-        INSERT INTO feedback (submission_id, category, message, photo_path, ip_hash, user_agent)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (submission_id, category, message, photo_path, ip_hash, user_agent))
-
-    db.execute("INSERT INTO rate_limits (ip_hash) VALUES (?)", (ip_hash,))
-    db.commit()
+    inserted = await asyncio.to_thread(
+        _insert_feedback, FEEDBACK_CATEGORY_CODES[category], message, photo_path, ip_hash, user_agent
+    )
+    if inserted is None or inserted is RATE_LIMITED:
+        # Nothing references the stored photo now
+        if photo_path:
+            await asyncio.to_thread(_remove_upload, os.path.join(UPLOAD_DIR, photo_path))
+        if inserted is RATE_LIMITED:
+            return templates.TemplateResponse("public/rate_limited.html", {"request": request}, status_code=429)
+        logger.error("No free submission ID after %s attempts", SUBMISSION_ID_ATTEMPTS)
+        raise HTTPException(status_code=503, detail="Could not save your feedback, please try again")
+    feedback_id, submission_id = inserted
 
-    feedback_id = db.execute("SELECT id FROM feedback WHERE submission_id = ?", (submission_id,)).fetchone()[0]
     process_feedback_async(feedback_id)
 
     return templates.TemplateResponse("public/thank_you.html", {
@@ -327,14 +448,31 @@ async def login_submit(
     request: Request,
     email: str = Form(...),
     password: str = Form(...),
-    db: sqlite3.Connection = Depends(get_db)
+    db: sqlite3.Connection = Depends(get_read_db)
 ):
+    # Lookup and verification only read; the writer is never held across a hash
     user = db.execute("SELECT * FROM users WHERE email = ? AND is_active = 1", (email,)).fetchone()
-    if not user or not verify_password(password, user["password_hash"]):
+    # A recent successful login is answered from the verified cache before any
+    # thread hop or lock; otherwise the CPU-bound hash runs off the event loop
+    if not user or not (
+        is_recently_verified(user, password)
+        or await asyncio.to_thread(verify_user_password, user, password)
+    ):
         return templates.TemplateResponse("admin/login.html", {
             "request": request, "error": "Invalid email or password"
         })
 
+    # Upgrade legacy bcrypt hashes to argon2 while we have the plaintext.
+    # Hash first, then take the writer for the UPDATE alone; the old-hash guard
+    # skips it if the password was changed in the meantime
+    if password_needs_rehash(user["password_hash"]):
+        new_hash = await asyncio.to_thread(hash_password, password)
+        await asyncio.to_thread(
+            _write,
+            "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+            (new_hash, user["id"], user["password_hash"])
+        )
+
     token = create_access_token({"sub": str(user["id"]), "role": user["role"]})
     response = RedirectResponse("/admin/inbox", status_code=302)
     response.set_cookie("access_token", token, httponly=True, samesite="lax", max_age=28800)
@@ -342,7 +480,10 @@ async def login_submit(
 
 
 @app.get("/admin/logout")
-async def logout():
+async def logout(request: Request):
+    token = request.cookies.get("access_token")
+    if token:
+        invalidate_user_cache(token=token)
     response = RedirectResponse("/admin/login", status_code=302)
     response.delete_cookie("access_token")
     return response
@@ -360,21 +501,27 @@ async def admin_inbox(
     page: int = Query(1, ge=1),
     per_page: int = Query(20),
     user=Depends(get_current_user),
-    db: sqlite3.Connection = Depends(get_db)
+    db: sqlite3.Connection = Depends(get_read_db)
 ):
     where = ["is_deleted = 0"]
     params = []
 
+    # Filter on the INTEGER codes so the indexes are used; unknown names match nothing
     if status:
-        where.append("status = ?")
-        params.append(status)
+        where.append("status_code = ?")
+        params.append(FEEDBACK_STATUS_CODES.get(status, -1))
     if category:
-        where.append("category = ?")
-        params.append(category)
+        where.append("category_code = ?")
+        params.append(FEEDBACK_CATEGORY_CODES.get(category, -1))
     if tag:
         where.append("tags LIKE ?")
         params.append(f"%{tag}%")
-    if search:
+    if search and len(search) >= FTS_MIN_SEARCH_LENGTH:
+        # Trigram FTS index; the quoted phrase matches as a substring of any indexed column
+        where.append("id IN (SELECT rowid FROM feedback_fts WHERE feedback_fts MATCH ?)")
+        params.append('"' + search.replace('"', '""') + '"')
+    elif search:
+        # Too short for trigrams, scan instead
         where.append("(message LIKE ? OR translation_en LIKE ? OR translation_ru LIKE ? OR summary LIKE ? OR submission_id LIKE ?)")
         s = f"%{search}%"
         params.extend([s, s, s, s, s])
@@ -383,19 +530,32 @@ async def admin_inbox(
     total = db.execute(f"SELECT COUNT(*) FROM feedback WHERE {where_clause}", params).fetchone()[0]
 
     offset = (page - 1) * per_page
-    rows = db.execute(
-        f"SELECT * FROM feedback WHERE {where_clause} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+    # Pick the page's ids first (on the status/category filters that runs on an index
+    # alone, so skipped OFFSET rows cost no table lookups), then read only what the
+    # inbox table renders for those rows; sqlite3.Row supports the f.<column> lookups
+    feedbacks = db.execute(
+        f"""SELECT id, submission_id, created_at, category, summary,
+               substr(message, 1, 80) AS message_preview, tags, photo_path, status, ai_status
+            FROM feedback
+            WHERE id IN (SELECT id FROM feedback WHERE {where_clause} ORDER BY created_ts DESC LIMIT ? OFFSET ?)
+            ORDER BY created_ts DESC""",
         params + [per_page, offset]
     ).fetchall()
-
-    feedbacks = [dict(r) for r in rows]
     total_pages = max(1, (total + per_page - 1) // per_page)
 
+    # One statement for the status counts: the IN list becomes three seeks on the
+    # covering index, and the rows come out already grouped by status_code
+    new_code, read_code, resolved_code = (FEEDBACK_STATUS_CODES[s] for s in ("new", "read", "resolved"))
+    counts = dict(db.execute(
+        "SELECT status_code, COUNT(*) FROM feedback "
+        "WHERE is_deleted = 0 AND status_code IN (?, ?, ?) GROUP BY status_code",
+        (new_code, read_code, resolved_code)
+    ).fetchall())
     stats = {
-        "total": db.execute("SELECT COUNT(*) FROM feedback WHERE is_deleted = 0").fetchone()[0],
-        "new": db.execute("SELECT COUNT(*) FROM feedback WHERE status = 'new' AND is_deleted = 0").fetchone()[0],
-        "read": db.execute("SELECT COUNT(*) FROM feedback WHERE status = 'read' AND is_deleted = 0").fetchone()[0],
-        "resolved": db.execute("SELECT COUNT(*) FROM feedback WHERE status = 'resolved' AND is_deleted = 0").fetchone()[0],
+        "total": db.execute("SELECT live_count FROM row_counts WHERE table_name = 'feedback'").fetchone()[0],
+        "new": counts.get(new_code, 0),
+        "read": counts.get(read_code, 0),
+        "resolved": counts.get(resolved_code, 0),
     }
 
     return templates.TemplateResponse("admin/inbox.html", {
@@ -420,7 +580,7 @@ async def feedback_detail(
     request: Request,
     feedback_id: int,
     user=Depends(get_current_user),
-    db: sqlite3.Connection = Depends(get_db)
+    db: sqlite3.Connection = Depends(get_read_db)
 ):
     row = db.execute("SELECT * FROM feedback WHERE id = ? AND is_deleted = 0", (feedback_id,)).fetchone()
     if not row:
@@ -428,10 +588,13 @@ async def feedback_detail(
 
     feedback = dict(row)
 
+    # Mark as read in a short write of its own (skipped if the status changed meanwhile)
     if feedback["status"] == "new":
-        db.execute("UPDATE feedback SET status = 'read', updated_at = ? WHERE id = ?",
-                    (datetime.utcnow().isoformat(), feedback_id))
-        db.commit()
+        await asyncio.to_thread(
+            _write,
+            f"UPDATE feedback SET status_code = ?, updated_ts = {NOW_TS_SQL} WHERE id = ? AND status_code = ?",
+            (FEEDBACK_STATUS_CODES["read"], feedback_id, FEEDBACK_STATUS_CODES["new"])
+        )
         feedback["status"] = "read"
 
     return templates.TemplateResponse("admin/detail.html", {
@@ -447,17 +610,18 @@ async def feedback_detail(
 async def update_status(
     feedback_id: int,
     request: Request,
-    user=Depends(get_current_user),
-    db: sqlite3.Connection = Depends(get_db)
+    user=Depends(get_current_user)
 ):
     data = await request.json()
     new_status = data.get("status")
-    if new_status not in ("new", "read", "in_progress", "resolved", "rejected"):
+    if new_status not in FEEDBACK_STATUS_CODES:
         raise HTTPException(status_code=400, detail="Invalid status")
 
-    db.execute("UPDATE feedback SET status = ?, updated_at = ? WHERE id = ?",
-               (new_status, datetime.utcnow().isoformat(), feedback_id))
-    db.commit()
+    await asyncio.to_thread(
+        _write,
+        f"UPDATE feedback SET status_code = ?, updated_ts = {NOW_TS_SQL} WHERE id = ?",
+        (FEEDBACK_STATUS_CODES[new_status], feedback_id)
+    )
     return {"ok": True}
 
 
@@ -465,27 +629,27 @@ async def update_status(
 async def update_note(
     feedback_id: int,
     request: Request,
-    user=Depends(get_current_user),
-    db: sqlite3.Connection = Depends(get_db)
+    user=Depends(get_current_user)
 ):
     data = await request.json()
     note = data.get("note", "")
-    db.execute("UPDATE feedback SET private_note = ?, updated_at = ? WHERE id = ?",
-               (note, datetime.utcnow().isoformat(), feedback_id))
-    db.commit()
+    await asyncio.to_thread(
+        _write,
+        f"UPDATE feedback SET private_note = ?, updated_ts = {NOW_TS_SQL} WHERE id = ?",
+        (note, feedback_id)
+    )
     return {"ok": True}
 
 
 @app.post("/api/feedback/bulk-status")
 async def bulk_status(
     request: Request,
-    user=Depends(get_current_user),
-    db: sqlite3.Connection = Depends(get_db)
+    user=Depends(get_current_user)
 ):
     data = await request.json()
     ids = data.get("ids", [])
     new_status = data.get("status")
-    if new_status not in ("new", "read", "in_progress", "resolved", "rejected"):
+    if new_status not in FEEDBACK_STATUS_CODES:
         raise HTTPException(status_code=400, detail="Invalid status")
     if not ids:
         raise HTTPException(status_code=400, detail="No IDs provided")
@@ -496,56 +660,68 @@ async def bulk_status(
     except (ValueError, TypeError):
         raise HTTPException(status_code=400, detail="Invalid ID format")
 
-    # Use parameterized query - build placeholders safely
-    placeholders = ",".join("?" * len(ids))
-    query = f"UPDATE feedback SET status = ?, updated_at = ? WHERE id IN ({placeholders})"
-    
-    db.execute(query, [new_status, datetime.utcnow().isoformat()] + ids)
-    db.commit()
+    # IDs go in as one JSON array parameter: the SQL text (and so the cached
+    # statement) is the same for any number of IDs, and each ID is a rowid lookup
+    await asyncio.to_thread(
+        _write, BULK_STATUS_SQL, (FEEDBACK_STATUS_CODES[new_status], orjson.dumps(ids).decode())
+    )
     return {"ok": True, "count": len(ids)}
 
 
 @app.post("/api/feedback/{feedback_id}/delete")
 async def soft_delete(
     feedback_id: int,
-    user=Depends(require_role("admin")),
-    db: sqlite3.Connection = Depends(get_db)
+    user=Depends(require_role("admin"))
 ):
-    db.execute("UPDATE feedback SET is_deleted = 1, updated_at = ? WHERE id = ?",
-               (datetime.utcnow().isoformat(), feedback_id))
-    db.commit()
+    await asyncio.to_thread(
+        _write, f"UPDATE feedback SET is_deleted = 1, updated_ts = {NOW_TS_SQL} WHERE id = ?", (feedback_id,)
+    )
     return {"ok": True}
 
 
 # ==================== CSV EXPORT ====================
 
-@app.get("/admin/export")
-async def export_csv(
-    request: Request,
-    user=Depends(get_current_user),
-    db: sqlite3.Connection = Depends(get_db)
-):
-    rows = db.execute("""
-        SELECT submission_id, category, message, status, detected_language,
-               translation_en, translation_ru, summary, tags, private_note,
-               ai_status, created_at, updated_at
-        FROM feedback WHERE is_deleted = 0 ORDER BY created_at DESC
-    """).fetchall()
+# Rows fetched and encoded per streamed chunk
+EXPORT_BATCH_SIZE = 500
+
 
-    output = io.StringIO()
-    writer = csv.writer(output)
+def _export_csv_chunks():
+    """Yield the CSV export as UTF-8 (with BOM) chunks of EXPORT_BATCH_SIZE rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
     writer.writerow([
         "Submission ID", "Category", "Message", "Status", "Language",
         "Translation EN", "Translation RU", "Summary", "Tags",
         "Private Note", "AI Status", "Created At", "Updated At"
     ])
-    for r in rows:
-        writer.writerow([r[c] for c in range(len(r))])
+    yield "\ufeff".encode("utf-8") + buffer.getvalue().encode("utf-8")
+
+    # Borrow our own connection: request dependencies are closed before the body streams
+    with read_connection() as db:
+        cursor = db.execute("""
+            SELECT submission_id, category, message, status, detected_language,
+                   translation_en, translation_ru, summary, tags, private_note,
+                   ai_status, created_at, updated_at
+            FROM feedback WHERE is_deleted = 0 ORDER BY created_ts DESC
+        """)
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
 
-    output.seek(0)
+
+@app.get("/admin/export")
+async def export_csv(
+    request: Request,
+    user=Depends(get_current_user)
+):
     filename = f"feedback_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode("utf-8-sig")),
+        _export_csv_chunks(),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -557,7 +733,7 @@ async def export_csv(
 async def users_page(
     request: Request,
     user=Depends(require_role("admin")),
-    db: sqlite3.Connection = Depends(get_db)
+    db: sqlite3.Connection = Depends(get_read_db)
 ):
     users = db.execute("SELECT * FROM users ORDER BY created_at DESC").fetchall()
     return templates.TemplateResponse("admin/users.html", {
@@ -571,7 +747,7 @@ async def users_page(
 async def create_user(
     request: Request,
     user=Depends(require_role("admin")),
-    db: sqlite3.Connection = Depends(get_db)
+    db: sqlite3.Connection = Depends(get_read_db)
 ):
     data = await request.json()
     email = data.get("email", "").strip()
@@ -588,11 +764,17 @@ async def create_user(
     if existing:
         raise HTTPException(status_code=400, detail="Email already exists")
 
-    db.execute(
-        "INSERT INTO users (email, password_hash, name, role) VALUES (?, ?, ?, ?)",
-        (email, hash_password(password), name, role)
-    )
-    db.commit()
+    # Hash before taking the writer; only the INSERT runs under it
+    password_hash = await asyncio.to_thread(hash_password, password)
+    try:
+        await asyncio.to_thread(
+            _write,
+            "INSERT INTO users (email, password_hash, name, role) VALUES (?, ?, ?, ?)",
+            (email, password_hash, name, role)
+        )
+    except sqlite3.IntegrityError:
+        # Created concurrently since the check above (email is UNIQUE)
+        raise HTTPException(status_code=400, detail="Email already exists")
     return {"ok": True}
 
 
@@ -600,7 +782,7 @@ async def create_user(
 async def toggle_user(
     user_id: int,
     user=Depends(require_role("admin")),
-    db: sqlite3.Connection = Depends(get_db)
+    db: sqlite3.Connection = Depends(get_read_db)
 ):
     """Toggle user active status. Admin only."""
     target = db.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
@@ -612,21 +794,20 @@ async def toggle_user(
         raise HTTPException(status_code=400, detail="Cannot deactivate yourself")
     
     new_active = 0 if target["is_active"] else 1
-    db.execute("UPDATE users SET is_active = ? WHERE id = ?", (new_active, user_id))
-    db.commit()
+    await asyncio.to_thread(_write, "UPDATE users SET is_active = ? WHERE id = ?", (new_active, user_id))
+    invalidate_user_cache(user_id=user_id)
     return {"ok": True, "is_active": new_active}
 
 
 @app.post("/api/users/{user_id}/delete")
 async def delete_user(
     user_id: int,
-    user=Depends(require_role("admin")),
-    db: sqlite3.Connection = Depends(get_db)
+    user=Depends(require_role("admin"))
 ):
     if user_id == user["id"]:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
-    db.execute("DELETE FROM users WHERE id = ?", (user_id,))
-    db.commit()
+    await asyncio.to_thread(_write, "DELETE FROM users WHERE id = ?", (user_id,))
+    invalidate_user_cache(user_id=user_id)
     return {"ok": True}
 
 
@@ -636,31 +817,29 @@ async def delete_user(
 async def analytics_page(
     request: Request,
     user=Depends(get_current_user),
-    db: sqlite3.Connection = Depends(get_db)
+    db: sqlite3.Connection = Depends(get_read_db)
 ):
     by_category = db.execute("""
         SELECT category, COUNT(*) as cnt FROM feedback
-        WHERE is_deleted = 0 GROUP BY category ORDER BY cnt DESC
+        WHERE is_deleted = 0 GROUP BY category_code ORDER BY cnt DESC
     """).fetchall()
 
     by_status = db.execute("""
         SELECT status, COUNT(*) as cnt FROM feedback
-        WHERE is_deleted = 0 GROUP BY status ORDER BY cnt DESC
+        WHERE is_deleted = 0 GROUP BY status_code ORDER BY cnt DESC
     """).fetchall()
 
-    by_tag = {}
-    tag_rows = db.execute("SELECT tags FROM feedback WHERE is_deleted = 0 AND tags != '' AND tags IS NOT NULL").fetchall()
-    for r in tag_rows:
-        for t in r["tags"].split(","):
-            t = t.strip()
-            if t:
-                by_tag[t] = by_tag.get(t, 0) + 1
-    by_tag_sorted = sorted(by_tag.items(), key=lambda x: x[1], reverse=True)
+    # feedback_tags is maintained by triggers on feedback.tags
+    by_tag = db.execute("""
+        SELECT ft.tag, COUNT(*) as cnt FROM feedback_tags ft
+        JOIN feedback f ON f.id = ft.feedback_id
+        WHERE f.is_deleted = 0 GROUP BY ft.tag ORDER BY cnt DESC, ft.tag
+    """).fetchall()
 
     daily = db.execute("""
-        SELECT DATE(created_at) as day, COUNT(*) as cnt FROM feedback
-        WHERE is_deleted = 0 AND created_at >= DATE('now', '-30 days')
-        GROUP BY DATE(created_at) ORDER BY day
+        SELECT DATE(created_ts, 'unixepoch') as day, COUNT(*) as cnt FROM feedback
+        WHERE is_deleted = 0 AND created_ts >= CAST(strftime('%s', DATE('now', '-30 days')) AS INTEGER)
+        GROUP BY day ORDER BY day
     """).fetchall()
 
     return templates.TemplateResponse("admin/analytics.html", {
@@ -668,6 +847,6 @@ async def analytics_page(
         "user": user,
         "by_category": [dict(r) for r in by_category],
         "by_status": [dict(r) for r in by_status],
-        "by_tag": by_tag_sorted,
+        "by_tag": [tuple(r) for r in by_tag],
         "daily": [dict(r) for r in daily],
     })
@@ -11,7 +11,9 @@ from datetime import datetime
 # Add app to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app.database import backup_database, cleanup_old_backups, verify_database_integrity, get_database_stats
+from app.database import (
+    backup_database, cleanup_old_backups, verify_database_integrity, verify_database_deep, get_database_stats
+)
 
 
 def main():
@@ -21,9 +23,10 @@ def main():
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
-    # Verify database integrity before backup
-    print("1. Verifying database integrity...")
-    if not verify_database_integrity():
+    # Verify database integrity before backup (full check on Sundays, quick check otherwise)
+    deep = datetime.now().weekday() == 6
+    print(f"1. Verifying database integrity ({'full' if deep else 'quick'} check)...")
+    if not (verify_database_deep() if deep else verify_database_integrity()):
         print("❌ Database integrity check failed!")
         print("⚠️  Backup aborted. Please check database.")
         return 1
@@ -40,10 +43,10 @@ def main():
     print(f"   WAL size: {stats['wal_size_mb']:.2f} MB")
     print()
     
-    # Create backup
-    print("3. Creating backup...")
+    # Create backup (compacted with VACUUM INTO on Sundays)
+    print(f"3. Creating {'compacted ' if deep else ''}backup...")
     try:
-        backup_path = backup_database()
+        backup_path = backup_database(compact=deep)
         backup_size = os.path.getsize(backup_path) / (1024 * 1024)
         print(f"✓ Backup created: {backup_path}")
         print(f"   Size: {backup_size:.2f} MB")
@@ -3,19 +3,18 @@
 Generate a cryptographically secure SECRET_KEY for production use.
 Usage: python generate_secret_key.py
 """
-import secrets
+import base64
+import os
 import string
 
+# 64 characters that are safe in shell/env files; a power-of-two alphabet lets
+# every 6 random bits select one character with no rejection step
+ALPHABET = string.ascii_letters + string.digits + "-_"
+
 def generate_secret_key(length=64):
     """Generate a cryptographically secure random key."""
-    # Use a mix of letters, digits, and punctuation for maximum entropy
-    alphabet = string.ascii_letters + string.digits + string.punctuation
-    # Remove characters that might cause issues in shell/env files
-    alphabet = alphabet.replace('"', '').replace("'", '').replace('\\', '').replace('$', '')
-    
-    # Generate using secrets module (cryptographically secure)
-    key = ''.join(secrets.choice(alphabet) for _ in range(length))
-    return key
+    raw = int.from_bytes(os.urandom((length * 6 + 7) // 8), 'big')
+    return ''.join(ALPHABET[(raw >> (6 * i)) & 0x3F] for i in range(length))
 
 def main():
     print("=" * 70)
@@ -23,21 +22,24 @@ def main():
     print("=" * 70)
     print()
     
+    # Entropy for options 1 and 2 in one OS read: 32 bytes + 48 bytes
+    raw = os.urandom(32 + 48)
+    
     # Generate hex-based key (recommended)
-    hex_key = secrets.token_hex(32)  # 32 bytes = 64 hex characters
+    hex_key = raw[:32].hex()  # 32 bytes = 64 hex characters
     print("Option 1: Hex-based key (recommended)")
     print(f"SECRET_KEY={hex_key}")
     print()
     
     # Generate URL-safe base64 key
-    urlsafe_key = secrets.token_urlsafe(48)  # ~64 characters
+    urlsafe_key = base64.urlsafe_b64encode(raw[32:]).rstrip(b'=').decode('ascii')  # 64 characters
     print("Option 2: URL-safe base64 key")
     print(f"SECRET_KEY={urlsafe_key}")
     print()
     
-    # Generate alphanumeric + punctuation key
+    # Generate alphanumeric + "-_" key
     mixed_key = generate_secret_key(64)
-    print("Option 3: Mixed alphanumeric + symbols")
+    print("Option 3: Alphanumeric + symbols (- and _)")
     print(f"SECRET_KEY={mixed_key}")
     print()
     
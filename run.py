@@ -1,6 +1,4 @@
 """Start the Budtender Feedback System."""
-import subprocess
-import sys
 import os
 
 
@@ -8,14 +6,18 @@ def main():
     # Ensure data directories exist
     os.makedirs("data/uploads", exist_ok=True)
 
-    # Initialize DB and seed
+    # Initialize DB (always: applies pending migrations) and seed on first start
+    from app.config import DATABASE_PATH, ENV
+    first_start = not os.path.exists(DATABASE_PATH)
+
     print("Initializing database...")
     from app.database import init_db
     init_db()
 
-    print("Seeding demo data...")
-    from seed_data import seed
-    seed()
+    if first_start:
+        print("Seeding demo data...")
+        from seed_data import seed
+        seed()
 
     print("\n" + "=" * 60)
     print("  BUDTENDER FEEDBACK SYSTEM - Starting...")
@@ -33,7 +35,14 @@ def main():
     print()
 
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    if ENV == "production":
+        # No reloader process; "auto" picks uvloop/httptools when installed
+        # (uvicorn[standard]) and falls back to asyncio/h11 otherwise.
+        # Exactly one worker: the schedulers, the SQLite writer lock and the
+        # auth user cache (invalidated in-process only) all assume a single process
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, workers=1, loop="auto", http="auto")
+    else:
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
 
 
 if __name__ == "__main__":
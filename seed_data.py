@@ -2,10 +2,30 @@
 import sqlite3
 import os
 import random
-from datetime import datetime, timedelta
+import time
+
+import orjson
+
+from app.config import FEEDBACK_CATEGORY_CODES, FEEDBACK_STATUS_CODES, AI_STATUS_CODES
+from app.database import STATEMENT_CACHE_SIZE
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "data", "budtender.db")
 
+# The whole batch is bound as one JSON array of row arrays and unpacked by
+# json_each in SQLite, so the statement is prepared and stepped once.
+# json_extract rather than ->> so it runs on SQLite older than 3.38
+INSERT_SQL = """
+    INSERT INTO feedback (submission_id, category_code, message, status_code, ip_hash, user_agent,
+        ai_status_code, translation_en, translation_ru, summary, tags, detected_language,
+        private_note, created_ts, updated_ts)
+    SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'), json_extract(value, '$[2]'),
+        json_extract(value, '$[3]'), json_extract(value, '$[4]'), json_extract(value, '$[5]'),
+        json_extract(value, '$[6]'), json_extract(value, '$[7]'), json_extract(value, '$[8]'),
+        json_extract(value, '$[9]'), json_extract(value, '$[10]'), json_extract(value, '$[11]'),
+        json_extract(value, '$[12]'), json_extract(value, '$[13]'), json_extract(value, '$[14]')
+    FROM json_each(?)
+"""
+
 DEMO_FEEDBACKS = [
     {
         "category": "complaint",
@@ -117,24 +137,41 @@ DEMO_FEEDBACKS = [
     },
 ]
 
+# Per-row fixed columns, resolved once at import: (category_code, message,
+# translation_en, translation_ru, summary, tags, detected_language)
+_DEMO_ROWS = tuple(
+    (FEEDBACK_CATEGORY_CODES[fb["category"]], fb["message"], fb["translation_en"], fb["translation_ru"],
+     fb["summary"], fb["tags"], fb["detected_language"])
+    for fb in DEMO_FEEDBACKS
+)
+
 
 def seed():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    db = sqlite3.connect(DB_PATH)
+    # Autocommit mode: the bulk insert below manages its own transaction
+    db = sqlite3.connect(DB_PATH, isolation_level=None, cached_statements=STATEMENT_CACHE_SIZE)
 
-    existing = db.execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
-    if existing > 0:
-        print(f"Database already has {existing} feedback entries. Skipping seed.")
+    # Stops at the first row instead of counting the table
+    if db.execute("SELECT 1 FROM feedback LIMIT 1").fetchone():
+        print("Database already has feedback entries. Skipping seed.")
         db.close()
         return
 
-    now = datetime.utcnow()
+    now_ts = int(time.time())
     statuses = ["new", "new", "new", "read", "read", "in_progress", "resolved"]
 
-    for i, fb in enumerate(DEMO_FEEDBACKS):
-        created = now - timedelta(days=random.randint(0, 29), hours=random.randint(0, 23), minutes=random.randint(0, 59))
-        sub_id = f"WDN-{random.randint(100,999)}-{random.randint(10,99)}"
-        status = random.choice(statuses)
+    # Draw all random values up front: one uniform minute offset within the
+    # last 30 days, one status and one distinct submission ID per row
+    n = len(_DEMO_ROWS)
+    rng = random.Random()
+    ages = rng.choices(range(30 * 24 * 60), k=n)
+    picked_statuses = rng.choices(statuses, k=n)
+    sub_ids = ["WDN-%03d-%02d" % (100 + a, 10 + b) for a, b in (divmod(x, 90) for x in rng.sample(range(900 * 90), n))]
+
+    rows = []
+    for i, ((category_code, message, translation_en, translation_ru, summary, tags, language),
+            age, status, sub_id) in enumerate(zip(_DEMO_ROWS, ages, picked_statuses, sub_ids)):
+        created_ts = now_ts - age * 60
         ip_hash = f"demo_hash_{i}"
 
         note = ""
@@ -143,20 +180,22 @@ def seed():
         elif status == "in_progress":
             note = "Looking into this."
 
-        db.execute("""
-            INSERT INTO feedback (submission_id, category, message, status, ip_hash, user_agent,
-                ai_status, translation_en, translation_ru, summary, tags, detected_language,
-                private_note, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, 'done', ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            sub_id, fb["category"], fb["message"], status, ip_hash, "Mozilla/5.0 Demo",
-            fb["translation_en"], fb["translation_ru"], fb["summary"], fb["tags"],
-            fb["detected_language"], note,
-            created.isoformat(), created.isoformat()
+        rows.append((
+            sub_id, category_code, message, FEEDBACK_STATUS_CODES[status],
+            ip_hash, "Mozilla/5.0 Demo", AI_STATUS_CODES["done"],
+            translation_en, translation_ru, summary, tags, language, note,
+            created_ts, created_ts
         ))
 
-    db.commit()
-    print(f"Seeded {len(DEMO_FEEDBACKS)} demo feedback entries.")
+    # One transaction for all rows instead of one per INSERT
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("PRAGMA temp_store=MEMORY")
+    with db:
+        db.execute("BEGIN IMMEDIATE")
+        db.execute(INSERT_SQL, (orjson.dumps(rows).decode(),))
+
+    print(f"Seeded {n} demo feedback entries.")
     db.close()
 
 
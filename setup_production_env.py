@@ -4,6 +4,7 @@ Production Environment Setup Script
 Interactive wizard to create production .env file
 """
 
+import getpass
 import os
 import sys
 import secrets
@@ -18,33 +19,55 @@ BLUE = '\033[94m'
 CYAN = '\033[96m'
 RESET = '\033[0m'
 
+# Message prefixes/suffixes, built once; the helpers write straight to stdout
+_RULE = f"{BLUE}{'='*70}{RESET}\n"
+_HEADER_START = f"\n{_RULE}{BLUE}"
+_HEADER_END = f"{RESET}\n{_RULE}\n"
+_SUCCESS = f"{GREEN}✓ "
+_ERROR = f"{RED}✗ "
+_WARNING = f"{YELLOW}⚠ "
+_INFO = f"{CYAN}ℹ "
+_END = f"{RESET}\n"
+
+_write = sys.stdout.write
+
 def print_header(text):
-    print(f"\n{BLUE}{'='*70}{RESET}")
-    print(f"{BLUE}{text}{RESET}")
-    print(f"{BLUE}{'='*70}{RESET}\n")
+    _write(_HEADER_START + text + _HEADER_END)
 
 def print_success(text):
-    print(f"{GREEN}✓ {text}{RESET}")
+    _write(_SUCCESS + text + _END)
 
 def print_error(text):
-    print(f"{RED}✗ {text}{RESET}")
+    _write(_ERROR + text + _END)
 
 def print_warning(text):
-    print(f"{YELLOW}⚠ {text}{RESET}")
+    _write(_WARNING + text + _END)
 
 def print_info(text):
-    print(f"{CYAN}ℹ {text}{RESET}")
+    _write(_INFO + text + _END)
 
 def generate_secret_key():
     """Generate a cryptographically secure secret key"""
     return secrets.token_hex(32)
 
+def open_private(path, mode="w"):
+    """Open path for writing, created as 0600 so secrets are never readable by others"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    # The creation mode doesn't apply to a file left over from an earlier run
+    os.fchmod(fd, 0o600)
+    return os.fdopen(fd, mode)
+
+def copy_private(src, dst):
+    """Copy src to dst with owner-only permissions from the start"""
+    with open(src, "rb") as fsrc, open_private(dst, "wb") as fdst:
+        shutil.copyfileobj(fsrc, fdst)
+
 def backup_existing_env():
     """Backup existing .env file if it exists"""
     if os.path.exists(".env"):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_path = f".env.backup_{timestamp}"
-        shutil.copy(".env", backup_path)
+        copy_private(".env", backup_path)
         print_success(f"Existing .env backed up to: {backup_path}")
         return backup_path
     return None
@@ -58,7 +81,6 @@ def get_input(prompt, default=None, required=False, secret=False):
     
     while True:
         if secret:
-            import getpass
             value = getpass.getpass(prompt_text)
         else:
             value = input(prompt_text).strip()
@@ -254,28 +276,30 @@ def main():
     print_header("Writing Configuration")
     
     try:
-        with open(".env", "w") as f:
-            f.write("# ===== Budtender Feedback System - Production Configuration =====\n")
-            f.write(f"# Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("# DO NOT commit this file to version control!\n\n")
-            
-            for key, value in config.items():
-                f.write(f"{key}={value}\n")
+        content = (
+            "# ===== Budtender Feedback System - Production Configuration =====\n"
+            f"# Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            "# DO NOT commit this file to version control!\n\n"
+            + "".join(f"{key}={value}\n" for key, value in config.items())
+        )
         
-        print_success(".env file created successfully")
+        # Write once to a temp file with secure permissions, then atomically
+        # replace .env (never leaves a partially written .env behind)
+        tmp_path = ".env.tmp"
+        with open_private(tmp_path) as f:
+            f.write(content)
+        os.replace(tmp_path, ".env")
         
-        # Set secure permissions
-        os.chmod(".env", 0o600)
+        print_success(".env file created successfully")
         print_success("File permissions set to 600 (owner read/write only)")
         
         # Create backup in secure location
         backup_dir = os.path.expanduser("~/.budtender_backups")
-        os.makedirs(backup_dir, exist_ok=True)
+        os.makedirs(backup_dir, mode=0o700, exist_ok=True)
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_path = os.path.join(backup_dir, f"env_backup_{timestamp}")
-        shutil.copy(".env", backup_path)
-        os.chmod(backup_path, 0o600)
+        copy_private(".env", backup_path)
         
         print_success(f"Backup created: {backup_path}")
         
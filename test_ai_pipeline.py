@@ -3,17 +3,21 @@
 AI Pipeline Test Suite
 Tests for OpenAI integration and fallback processing
 """
+import atexit
 import os
 import sys
+import threading
 import time
+import random
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add app to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.config import DATABASE_PATH, OPENAI_API_KEY
-from app.ai_pipeline import process_feedback_async, _process_fallback
+from app.config import DATABASE_PATH, OPENAI_API_KEY, FEEDBACK_CATEGORY_CODES, AI_STATUS_CODES
+from app.ai_pipeline import process_feedback_async, completion_event, _process_fallback
 
 class Colors:
     GREEN = '\033[92m'
@@ -33,49 +37,91 @@ def print_section(name):
     print(f"{Colors.BLUE}{name}{Colors.END}")
     print(f"{Colors.BLUE}{'='*70}{Colors.END}\n")
 
-def create_test_feedback(message, category="complaint"):
-    """Create a test feedback entry in the database"""
-    db = sqlite3.connect(DATABASE_PATH)
-    db.row_factory = sqlite3.Row
-    
-    # Generate submission ID
-    import random
-    import string
-    submission_id = f"TEST-{random.randint(100,999)}-{random.randint(10,99)}"
-    
-    # Insert feedback
-    db.execute("""
-        INSERT INTO feedback (submission_id, category, message, ip_hash, user_agent, ai_status)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (submission_id, category, message, "test_hash", "test_agent", "pending"))
+# One autocommit connection per thread, reused by every helper and closed at exit
+_tls = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+
+def _conn():
+    """This thread's test database connection (WAL, autocommit)"""
+    db = getattr(_tls, "db", None)
+    if db is None:
+        db = sqlite3.connect(DATABASE_PATH, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA temp_store=MEMORY")
+        _tls.db = db
+        with _connections_lock:
+            _connections.append(db)
+    return db
+
+@atexit.register
+def _close_connections():
+    with _connections_lock:
+        for db in _connections:
+            db.close()
+        _connections.clear()
+
+# IDs of feedback created by the suite, deleted together at teardown
+_created_ids = []
+
+INSERT_TEST_FEEDBACK_SQL = """
+    INSERT INTO feedback (submission_id, category_code, message, ip_hash, user_agent, ai_status_code)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+def create_test_feedbacks(messages, category="complaint"):
+    """Create test feedback entries in one transaction; returns their IDs in order"""
+    db = _conn()
+    
+    # Distinct submission IDs within the batch
+    submission_ids = ["TEST-%03d-%02d" % (100 + a, 10 + b)
+                      for a, b in (divmod(x, 90) for x in random.sample(range(900 * 90), len(messages)))]
+    rows = [
+        (submission_id, FEEDBACK_CATEGORY_CODES[category], message, "test_hash", "test_agent", AI_STATUS_CODES["pending"])
+        for submission_id, message in zip(submission_ids, messages)
+    ]
     
-    db.commit()
+    with db:
+        db.execute("BEGIN IMMEDIATE")
+        db.executemany(INSERT_TEST_FEEDBACK_SQL, rows)
     
-    # Get feedback ID
-    feedback_id = db.execute(
-        "SELECT id FROM feedback WHERE submission_id = ?", 
-        (submission_id,)
-    ).fetchone()[0]
+    # Get feedback IDs
+    placeholders = ",".join("?" * len(submission_ids))
+    ids = dict(db.execute(
+        f"SELECT submission_id, id FROM feedback WHERE submission_id IN ({placeholders})",
+        submission_ids
+    ).fetchall())
     
-    db.close()
-    return feedback_id
+    feedback_ids = [ids[submission_id] for submission_id in submission_ids]
+    _created_ids.extend(feedback_ids)
+    return feedback_ids
+
+def create_test_feedback(message, category="complaint"):
+    """Create a test feedback entry in the database"""
+    return create_test_feedbacks([message], category)[0]
 
 def get_feedback_status(feedback_id):
     """Get feedback AI status and results"""
-    db = sqlite3.connect(DATABASE_PATH)
-    db.row_factory = sqlite3.Row
-    
-    row = db.execute(
+    cursor = _conn().execute(
         "SELECT * FROM feedback WHERE id = ?", 
         (feedback_id,)
-    ).fetchone()
+    )
+    cursor.row_factory = sqlite3.Row
+    row = cursor.fetchone()
     
-    db.close()
     return dict(row) if row else None
 
 def wait_for_processing(feedback_id, timeout=10):
     """Wait for AI processing to complete"""
     start_time = time.time()
+    
+    # Block on the pipeline's completion event; poll only if it is not
+    # queued in this process (already finished, or queued elsewhere)
+    event = completion_event(feedback_id)
+    if event is not None:
+        event.wait(timeout)
+    
     while time.time() - start_time < timeout:
         feedback = get_feedback_status(feedback_id)
         if feedback and feedback['ai_status'] in ('done', 'failed'):
@@ -83,12 +129,13 @@ def wait_for_processing(feedback_id, timeout=10):
         time.sleep(0.5)
     return None
 
-def cleanup_test_feedback(feedback_id):
-    """Remove test feedback from database"""
-    db = sqlite3.connect(DATABASE_PATH)
-    db.execute("DELETE FROM feedback WHERE id = ?", (feedback_id,))
-    db.commit()
-    db.close()
+def cleanup_test_feedback():
+    """Remove all feedback created by this suite in one statement"""
+    if not _created_ids:
+        return
+    placeholders = ",".join("?" * len(_created_ids))
+    _conn().execute(f"DELETE FROM feedback WHERE id IN ({placeholders})", _created_ids)
+    _created_ids.clear()
 
 # ==================== FALLBACK MODE TESTS ====================
 
@@ -118,8 +165,6 @@ def test_fallback_english():
     else:
         print_test("English text processed", False, "Timeout waiting for processing")
     
-    cleanup_test_feedback(feedback_id)
-    
     # Restore OpenAI key
     if original_key:
         os.environ['OPENAI_API_KEY'] = original_key
@@ -141,8 +186,6 @@ def test_fallback_thai():
                   f"Status: {result['ai_status']}, Lang: {result['detected_language']}, Tags: {result['tags']}")
     else:
         print_test("Thai text processed", False, "Timeout")
-    
-    cleanup_test_feedback(feedback_id)
 
 def test_fallback_cyrillic():
     """Test 1.3: Fallback processing with Cyrillic text"""
@@ -161,8 +204,6 @@ def test_fallback_cyrillic():
                   f"Status: {result['ai_status']}, Lang: {result['detected_language']}, Tags: {result['tags']}")
     else:
         print_test("Cyrillic text processed", False, "Timeout")
-    
-    cleanup_test_feedback(feedback_id)
 
 def test_fallback_keyword_tagging():
     """Test 1.4: Keyword-based tagging accuracy"""
@@ -173,11 +214,15 @@ def test_fallback_keyword_tagging():
         ("Schedule conflicts with manager", ["Schedule", "Management"]),
     ]
     
-    for message, expected_tags in test_cases:
-        feedback_id = create_test_feedback(message)
+    feedback_ids = create_test_feedbacks([message for message, _ in test_cases])
+    for feedback_id in feedback_ids:
         process_feedback_async(feedback_id)
-        result = wait_for_processing(feedback_id)
-        
+    
+    # Wait for all cases concurrently
+    with ThreadPoolExecutor(max_workers=len(feedback_ids)) as executor:
+        results = list(executor.map(wait_for_processing, feedback_ids))
+    
+    for (message, expected_tags), feedback_id, result in zip(test_cases, feedback_ids, results):
         if result:
             result_tags = result['tags'].split(',') if result['tags'] else []
             # Check if at least one expected tag is present
@@ -187,8 +232,6 @@ def test_fallback_keyword_tagging():
                       f"Expected: {expected_tags}, Got: {result_tags}")
         else:
             print_test(f"Keyword tagging: '{message[:40]}...'", False, "Timeout")
-        
-        cleanup_test_feedback(feedback_id)
 
 # ==================== OPENAI MODE TESTS ====================
 
@@ -218,8 +261,6 @@ def test_openai_processing():
                   f"Status: {result['ai_status']}, Summary: {result['summary'][:50]}...")
     else:
         print_test("OpenAI processing completed", False, "Timeout (30s)")
-    
-    cleanup_test_feedback(feedback_id)
 
 def test_openai_invalid_key():
     """Test 2.2: Fallback on invalid API key"""
@@ -249,8 +290,6 @@ def test_openai_invalid_key():
     else:
         print_test("Fallback on invalid API key", False, "Timeout")
     
-    cleanup_test_feedback(feedback_id)
-    
     # Restore original key
     if original_key:
         os.environ['OPENAI_API_KEY'] = original_key
@@ -273,8 +312,6 @@ def test_empty_message():
                   f"Status: {result['ai_status']}, Lang: {result['detected_language']}")
     else:
         print_test("Empty message handled", False, "Timeout")
-    
-    cleanup_test_feedback(feedback_id)
 
 def test_very_long_message():
     """Test 3.2: Very long message handling"""
@@ -292,8 +329,6 @@ def test_very_long_message():
                   f"Status: {result['ai_status']}, Summary length: {summary_length}")
     else:
         print_test("Long message handled", False, "Timeout")
-    
-    cleanup_test_feedback(feedback_id)
 
 def test_special_characters():
     """Test 3.3: Special characters handling"""
@@ -310,8 +345,6 @@ def test_special_characters():
                   f"Status: {result['ai_status']}")
     else:
         print_test("Special characters handled", False, "Timeout")
-    
-    cleanup_test_feedback(feedback_id)
 
 # ==================== STATUS TESTS ====================
 
@@ -343,8 +376,6 @@ def test_status_transitions():
                   f"Status: {final['ai_status']}")
     else:
         print_test("Final status is 'done' or 'failed'", False, "Timeout")
-    
-    cleanup_test_feedback(feedback_id)
 
 # ==================== MAIN ====================
 
@@ -365,19 +396,22 @@ def run_all_tests():
     print(f"OpenAI Key: {'✓ Configured' if OPENAI_API_KEY else '✗ Not configured'}\n")
     
     # Run tests
-    test_fallback_english()
-    test_fallback_thai()
-    test_fallback_cyrillic()
-    test_fallback_keyword_tagging()
-    
-    test_openai_processing()
-    test_openai_invalid_key()
-    
-    test_empty_message()
-    test_very_long_message()
-    test_special_characters()
-    
-    test_status_transitions()
+    try:
+        test_fallback_english()
+        test_fallback_thai()
+        test_fallback_cyrillic()
+        test_fallback_keyword_tagging()
+        
+        test_openai_processing()
+        test_openai_invalid_key()
+        
+        test_empty_message()
+        test_very_long_message()
+        test_special_characters()
+        
+        test_status_transitions()
+    finally:
+        cleanup_test_feedback()
     
     print(f"\n{Colors.YELLOW}{'='*70}{Colors.END}")
     print(f"{Colors.YELLOW}Test suite completed{Colors.END}")
@@ -111,8 +111,19 @@ def test_indexes_created():
         
         db.close()
         
-        if len(custom_indexes) < 10:  # We should have at least 10 custom indexes
-            print_fail(f"Only {len(custom_indexes)} indexes found")
+        expected = {
+            'idx_feedback_list_cover',
+            'idx_feedback_created_live',
+            'idx_feedback_category_live',
+            'idx_feedback_ai_status',
+            'idx_feedback_tags_tag',
+            'idx_rate_limits_ip_time',
+            'idx_rate_limits_time',
+            'idx_users_active',
+        }
+        missing = expected.difference(custom_indexes)
+        if missing:
+            print_fail(f"Missing indexes: {', '.join(sorted(missing))}")
             return False
         
         print_pass()
@@ -156,9 +167,9 @@ def test_foreign_keys_enabled():
     print_test("Foreign keys enabled")
     
     try:
-        from app.database import get_db
+        from app.database import get_read_db
         
-        db_gen = get_db()
+        db_gen = get_read_db()
         db = next(db_gen)
         
         cursor = db.cursor()
@@ -184,9 +195,9 @@ def test_pragma_optimizations():
     print_test("PRAGMA optimizations applied")
     
     try:
-        from app.database import get_db
+        from app.database import get_read_db
         
-        db_gen = get_db()
+        db_gen = get_read_db()
         db = next(db_gen)
         cursor = db.cursor()
         
@@ -5,7 +5,7 @@ Shows how the cleanup mechanism works
 """
 import sqlite3
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 # Add app to path
@@ -58,9 +58,10 @@ def insert_test_data():
     ]
     
     for ip_hash, timestamp in test_data:
+        # submitted_at is stored as Unix epoch seconds
         db.execute(
             "INSERT INTO rate_limits (ip_hash, submitted_at) VALUES (?, ?)",
-            (ip_hash, timestamp.isoformat())
+            (ip_hash, int(timestamp.replace(tzinfo=timezone.utc).timestamp()))
         )
     
     db.commit()